@@ -3,16 +3,23 @@
 负责账户配置、多账户协调和会话缓存管理
 """
 import asyncio
+import heapq
 import json
 import logging
 import os
 import time
-from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, TYPE_CHECKING
+from typing import AsyncIterator, Container, Dict, List, Optional, TYPE_CHECKING
 
 from fastapi import HTTPException
 
+from core.circuit_breaker import CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, CircuitBreaker
+from core.rate_limit import DEFAULT_RATE_LIMIT_PER_MINUTE, AdaptiveTokenBucket
+from core.scheduler import DEFAULT_SCHEDULER_POLICY, SchedulerPolicy, create_scheduler
+from core.session_cache import SESSION_CACHE_SWEEP_BATCH, SessionCache
+
 if TYPE_CHECKING:
     from core.jwt import JWTManager
 
@@ -25,7 +32,32 @@ else:
     ACCOUNTS_FILE = "data/accounts.json"  # 本地存储（统一到 data 目录）
 
 
-@dataclass
+# 后台 JWT 刷新：检查间隔（秒）和最大并发数
+JWT_REFRESH_CHECK_INTERVAL_SECONDS = 5
+JWT_REFRESH_CONCURRENCY = 4
+
+# 定时器堆中过期条目超过有效条目（加上该余量）时重建堆
+TIMER_HEAP_COMPACT_SLACK = 64
+
+# 延迟EWMA平滑系数（越大越偏向最近的样本）
+LATENCY_EWMA_ALPHA = 0.3
+
+# 北京时区 UTC+8（过期时间按北京时间记录）
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+
+def parse_expires_at(expires_at: Optional[str]) -> Optional[float]:
+    """解析过期时间字符串为 Unix 时间戳（格式错误或未设置返回 None）"""
+    if not expires_at:
+        return None
+    try:
+        expire_time = datetime.strptime(expires_at, "%Y-%m-%d %H:%M:%S")
+        return expire_time.replace(tzinfo=BEIJING_TZ).timestamp()
+    except Exception:
+        return None
+
+
+@dataclass(slots=True)
 class AccountConfig:
     """单个账户配置"""
     account_id: str
@@ -35,32 +67,32 @@ class AccountConfig:
     config_id: str
     expires_at: Optional[str] = None  # 账户过期时间 (格式: "2025-12-23 10:59:21")
     disabled: bool = False  # 手动禁用状态
+    # 过期时间戳（加载时解析一次，之后的过期判断只做数值比较）
+    expires_ts: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.expires_ts = parse_expires_at(self.expires_at)
+
+    def get_remaining_seconds(self, now: Optional[float] = None) -> Optional[float]:
+        """计算账户剩余秒数"""
+        if self.expires_ts is None:
+            return None
+        return self.expires_ts - (time.time() if now is None else now)
 
     def get_remaining_hours(self) -> Optional[float]:
         """计算账户剩余小时数"""
-        if not self.expires_at:
-            return None
-        try:
-            # 解析过期时间（假设为北京时间）
-            beijing_tz = timezone(timedelta(hours=8))
-            expire_time = datetime.strptime(self.expires_at, "%Y-%m-%d %H:%M:%S")
-            expire_time = expire_time.replace(tzinfo=beijing_tz)
-
-            # 当前时间（北京时间）
-            now = datetime.now(beijing_tz)
-
-            # 计算剩余时间
-            remaining = (expire_time - now).total_seconds() / 3600
-            return remaining
-        except Exception:
-            return None
+        remaining = self.get_remaining_seconds()
+        return remaining / 3600 if remaining is not None else None
 
-    def is_expired(self) -> bool:
-        """检查账户是否已过期"""
-        remaining = self.get_remaining_hours()
-        if remaining is None:
-            return False  # 未设置过期时间，默认不过期
-        return remaining <= 0
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """检查账户是否已过期（未设置过期时间默认不过期）"""
+        if self.expires_ts is None:
+            return False
+        return self.expires_ts <= (time.time() if now is None else now)
+
+    def credentials(self) -> tuple:
+        """登录凭据（变化后 JWT 和已创建的 Session 都不再沿用）"""
+        return (self.secure_c_ses, self.host_c_oses, self.csesidx, self.config_id)
 
 
 def format_account_expiration(remaining_hours: Optional[float]) -> tuple:
@@ -93,26 +125,116 @@ class AccountManager:
         self.account_failure_threshold = account_failure_threshold
         self.rate_limit_cooldown_seconds = rate_limit_cooldown_seconds
         self.jwt_manager: Optional['JWTManager'] = None  # 延迟初始化
-        self.is_available = True
+        self.pool: Optional['MultiAccountManager'] = None  # 所属的多账户协调器（状态变化时通知）
+        self._is_available = True
         self.last_error_time = 0.0
-        self.last_429_time = 0.0  # 429错误专属时间戳
+        self._last_429_time = 0.0  # 429错误专属时间戳
         self.error_count = 0
         self.conversation_count = 0  # 累计对话次数
+        # 负载指标（供调度策略使用）
+        self.in_flight = 0  # 正在处理的上游请求数
+        self.latency_ewma = 0.0  # 上游响应延迟的指数加权平均（秒），0 表示尚无样本
+        self.rate_limiter = AdaptiveTokenBucket()  # 自适应限流（由协调器按配置设置上限）
+        self.circuit = CircuitBreaker()  # 连续失败熔断（到期后后台探测恢复）
+
+    def begin_request(self):
+        """开始一次上游对话请求"""
+        self.in_flight += 1
+        self.rate_limiter.consume()
+        if self.rate_limiter.tokens < 1:
+            # 令牌耗尽，暂时移出可用集合，补充后自动恢复
+            self._notify_state_change()
+
+    def end_request(self):
+        """结束一次上游对话请求（无论成功失败）"""
+        self.in_flight = max(0, self.in_flight - 1)
+
+    def record_latency(self, seconds: float):
+        """记录一次上游响应延迟（收到响应头的耗时）"""
+        if self.latency_ewma <= 0:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma += LATENCY_EWMA_ALPHA * (seconds - self.latency_ewma)
+
+    @property
+    def is_available(self) -> bool:
+        return self._is_available
+
+    @is_available.setter
+    def is_available(self, value: bool):
+        if value != self._is_available:
+            self._is_available = value
+            self._notify_state_change()
+
+    @property
+    def last_429_time(self) -> float:
+        return self._last_429_time
+
+    @last_429_time.setter
+    def last_429_time(self, value: float):
+        if value != self._last_429_time:
+            self._last_429_time = value
+            self._notify_state_change()
+
+    def _notify_state_change(self):
+        """可用性相关状态变化时，通知协调器更新可用账户集合"""
+        if self.pool is not None:
+            self.pool.refresh_account(self)
+
+    def trip_circuit(self) -> float:
+        """连续失败达到阈值：打开熔断器，返回退避秒数"""
+        if not self.circuit.is_closed:
+            # 已在熔断中（并发请求相继失败），不重复累加退避
+            return self.circuit.remaining()
+        backoff = self.circuit.trip()
+        self.is_available = False
+        self._notify_state_change()  # 安排探测定时器
+        return backoff
+
+    async def probe(self):
+        """半开探测：刷新一次 JWT，成功则恢复账户，失败则继续熔断"""
+        self.circuit.begin_probe()
+        try:
+            # 探测必须真实请求 getoxsrf，不能用缓存的密钥本地签发
+            await self._get_jwt_manager()._refresh(force_fetch=True)
+        except Exception as e:
+            backoff = self.circuit.trip()
+            logger.warning(f"[ACCOUNT] [{self.config.account_id}] 熔断探测失败: {type(e).__name__}，{backoff:.0f}秒后再次探测")
+            self._notify_state_change()
+            return
+        self.circuit.close()
+        self.error_count = 0
+        self.is_available = True
+        logger.info(f"[ACCOUNT] [{self.config.account_id}] 熔断探测成功，账户已恢复")
+
+    def invalidate_jwt(self):
+        """上游返回 401：丢弃缓存的签名密钥，下次获取 JWT 时重新请求"""
+        if self.jwt_manager is not None:
+            self.jwt_manager.invalidate_key()
 
-    async def get_jwt(self, request_id: str = "") -> str:
-        """获取 JWT token (带错误处理)"""
+    def _get_jwt_manager(self) -> "JWTManager":
+        if self.jwt_manager is None:
+            # 延迟初始化 JWTManager (避免循环依赖)
+            from core.jwt import JWTManager
+            self.jwt_manager = JWTManager(self.config, self.http_client, self.user_agent)
+        return self.jwt_manager
+
+    async def get_jwt(self, request_id: str = "", track_errors: bool = True) -> str:
+        """获取 JWT token (带错误处理)
+
+        track_errors=False 时失败不计入账户错误计数、不触发熔断（后台预创建等非请求路径使用）
+        """
         # 检查账户是否过期
         if self.config.is_expired():
             self.is_available = False
             logger.warning(f"[ACCOUNT] [{self.config.account_id}] 账户已过期，已自动禁用")
             raise HTTPException(403, f"Account {self.config.account_id} has expired")
 
+        if not track_errors:
+            return await self._get_jwt_manager().get(request_id)
+
         try:
-            if self.jwt_manager is None:
-                # 延迟初始化 JWTManager (避免循环依赖)
-                from core.jwt import JWTManager
-                self.jwt_manager = JWTManager(self.config, self.http_client, self.user_agent)
-            jwt = await self.jwt_manager.get(request_id)
+            jwt = await self._get_jwt_manager().get(request_id)
             self.is_available = True
             self.error_count = 0
             return jwt
@@ -121,18 +243,22 @@ class AccountManager:
             self.error_count += 1
             # 使用配置的失败阈值
             if self.error_count >= self.account_failure_threshold:
-                self.is_available = False
-                logger.error(f"[ACCOUNT] [{self.config.account_id}] JWT获取连续失败{self.error_count}次，账户已永久禁用")
+                backoff = self.trip_circuit()
+                logger.error(f"[ACCOUNT] [{self.config.account_id}] JWT获取连续失败{self.error_count}次，账户已熔断（{backoff:.0f}秒后探测恢复）")
             else:
                 # 安全：只记录异常类型，不记录详细信息
                 logger.warning(f"[ACCOUNT] [{self.config.account_id}] JWT获取失败({self.error_count}/{self.account_failure_threshold}): {type(e).__name__}")
             raise
 
     def should_retry(self) -> bool:
-        """检查账户是否可重试（429错误10分钟后恢复，普通错误永久禁用）"""
+        """检查账户是否可重试（429错误冷却后恢复，熔断中的账户等待探测恢复）"""
         if self.is_available:
             return True
 
+        # 熔断中：由后台探测决定何时恢复
+        if not self.circuit.is_closed:
+            return False
+
         current_time = time.time()
 
         # 检查429冷却期（10分钟后自动恢复）
@@ -166,96 +292,256 @@ class AccountManager:
         if self.is_available:
             return (0, None)
 
+        # 熔断中（显示距离下一次探测的时间）
+        if self.circuit.state == CIRCUIT_OPEN:
+            return (max(1, int(self.circuit.remaining(current_time))), "熔断")
+        if self.circuit.state == CIRCUIT_HALF_OPEN:
+            return (1, "熔断探测中")
+
         # 普通错误永久禁用
         return (-1, "错误禁用")
 
 
+class SessionLockEntry:
+    """对话锁及其引用计数（持有者 + 等待者）"""
+    __slots__ = ("lock", "refs")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.refs = 0
+
+
 class MultiAccountManager:
     """多账户协调器"""
     def __init__(self, session_cache_ttl_seconds: int):
         self.accounts: Dict[str, AccountManager] = {}
         self.account_list: List[str] = []  # 账户ID列表 (用于轮询)
-        self.current_index = 0
-        self._cache_lock = asyncio.Lock()  # 缓存操作专用锁
-        self._index_lock = asyncio.Lock()  # 索引更新专用锁
-        # 全局会话缓存：{conv_key: {"account_id": str, "session_id": str, "updated_at": float}}
-        self.global_session_cache: Dict[str, dict] = {}
-        self.cache_max_size = 1000  # 最大缓存条目数
-        self.cache_ttl = session_cache_ttl_seconds  # 缓存过期时间（秒）
-        # Session级别锁：防止同一对话的并发请求冲突
-        self._session_locks: Dict[str, asyncio.Lock] = {}
-        self._session_locks_lock = asyncio.Lock()  # 保护锁字典的锁
-        self._session_locks_max_size = 2000  # 最大锁数量
-
-    def _clean_expired_cache(self):
-        """清理过期的缓存条目"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, value in self.global_session_cache.items()
-            if current_time - value["updated_at"] > self.cache_ttl
-        ]
-        for key in expired_keys:
-            del self.global_session_cache[key]
-        if expired_keys:
-            logger.info(f"[CACHE] 清理 {len(expired_keys)} 个过期会话缓存")
-
-    def _ensure_cache_size(self):
-        """确保缓存不超过最大大小（LRU策略）"""
-        if len(self.global_session_cache) > self.cache_max_size:
-            # 按更新时间排序，删除最旧的20%
-            sorted_items = sorted(
-                self.global_session_cache.items(),
-                key=lambda x: x[1]["updated_at"]
-            )
-            remove_count = len(sorted_items) - int(self.cache_max_size * 0.8)
-            for key, _ in sorted_items[:remove_count]:
-                del self.global_session_cache[key]
-            logger.info(f"[CACHE] LRU清理 {remove_count} 个最旧会话缓存")
-
-    async def start_background_cleanup(self):
-        """启动后台缓存清理任务（每5分钟执行一次）"""
-        try:
-            while True:
-                await asyncio.sleep(300)  # 5分钟
-                async with self._cache_lock:
-                    self._clean_expired_cache()
-                    self._ensure_cache_size()
-        except asyncio.CancelledError:
-            logger.info("[CACHE] 后台清理任务已停止")
-        except Exception as e:
-            logger.error(f"[CACHE] 后台清理任务异常: {e}")
+        # 可用账户集合：状态变化时增量维护，选择账户时无需遍历全部账户
+        self._ready: List[AccountManager] = []  # 可用账户（无序，删除时与末尾交换）
+        self._ready_pos: Dict[str, int] = {}  # 账户ID -> 在 _ready 中的下标
+        self.scheduler: SchedulerPolicy = create_scheduler(DEFAULT_SCHEDULER_POLICY)
+        # 令牌耗尽、等待补充的账户（可用账户全部耗尽时作为兜底）
+        self._throttled: Dict[str, AccountManager] = {}
+        self._probe_tasks: set = set()  # 进行中的熔断探测任务（保持引用防止被回收）
+        self.rate_limit_per_minute = DEFAULT_RATE_LIMIT_PER_MINUTE
+        # 定时器堆：[(到期时间, 账户ID)]，用于429冷却结束和账户过期时重新判定
+        self._timers: List[tuple] = []
+        self._timer_due: Dict[str, float] = {}  # 账户ID -> 当前有效的到期时间（堆中其余条目视为过期）
+        # 全局会话缓存（LRU + TTL）：conv_key -> {"account_id": str, "session_id": str, "updated_at": float}
+        self.global_session_cache = SessionCache(session_cache_ttl_seconds)
+        # Session级别锁：防止同一对话的并发请求冲突（只保留有持有者或等待者的对话）
+        self._session_locks: Dict[str, SessionLockEntry] = {}
+
+    @property
+    def cache_ttl(self) -> int:
+        """会话缓存过期时间（秒）"""
+        return self.global_session_cache.ttl
+
+    @cache_ttl.setter
+    def cache_ttl(self, value: int):
+        self.global_session_cache.ttl = value
+
+    @property
+    def cache_max_size(self) -> int:
+        """会话缓存最大条目数"""
+        return self.global_session_cache.max_size
+
+    def set_session_cache_size(self, max_size: int):
+        """调整会话缓存容量"""
+        if max_size == self.global_session_cache.max_size:
+            return
+        evicted = self.global_session_cache.resize(max_size)
+        if evicted:
+            logger.info(f"[CACHE] 缓存容量调整为 {max_size}，淘汰 {evicted} 个最久未使用的会话缓存")
+
+    async def sweep_session_cache(self) -> int:
+        """分批清理过期的会话缓存（批次之间让出事件循环），返回清理的条目数"""
+        total = 0
+        while True:
+            removed = self.global_session_cache.sweep()
+            total += removed
+            if removed < SESSION_CACHE_SWEEP_BATCH:
+                break
+            await asyncio.sleep(0)
+        if total:
+            logger.info(f"[CACHE] 清理 {total} 个过期会话缓存")
+        return total
 
     async def set_session_cache(self, conv_key: str, account_id: str, session_id: str):
-        """线程安全地设置会话缓存"""
-        async with self._cache_lock:
-            self.global_session_cache[conv_key] = {
-                "account_id": account_id,
-                "session_id": session_id,
-                "updated_at": time.time()
-            }
-            # 检查缓存大小
-            self._ensure_cache_size()
+        """设置会话缓存（缓存操作不含 await，在事件循环内天然原子，无需加锁）"""
+        self.global_session_cache.set(conv_key, account_id, session_id)
 
     async def update_session_time(self, conv_key: str):
-        """线程安全地更新会话时间戳"""
-        async with self._cache_lock:
-            if conv_key in self.global_session_cache:
-                self.global_session_cache[conv_key]["updated_at"] = time.time()
-
-    async def acquire_session_lock(self, conv_key: str) -> asyncio.Lock:
-        """获取指定对话的锁（用于防止同一对话的并发请求冲突）"""
-        async with self._session_locks_lock:
-            # 清理过多的锁（LRU策略：删除不在缓存中的锁）
-            if len(self._session_locks) > self._session_locks_max_size:
-                # 只保留当前缓存中存在的锁
-                valid_keys = set(self.global_session_cache.keys())
-                keys_to_remove = [k for k in self._session_locks if k not in valid_keys]
-                for k in keys_to_remove[:len(keys_to_remove)//2]:  # 删除一半无效锁
-                    del self._session_locks[k]
-
-            if conv_key not in self._session_locks:
-                self._session_locks[conv_key] = asyncio.Lock()
-            return self._session_locks[conv_key]
+        """更新会话时间戳"""
+        self.global_session_cache.touch(conv_key)
+
+    @asynccontextmanager
+    async def session_lock(self, conv_key: str) -> AsyncIterator[None]:
+        """持有指定对话的锁（用于防止同一对话的并发请求冲突）
+
+        锁表按引用计数维护：最后一个持有者或等待者离开时删除条目，
+        登记和注销都不含 await，无需全局锁
+        """
+        entry = self._session_locks.get(conv_key)
+        if entry is None:
+            entry = self._session_locks[conv_key] = SessionLockEntry()
+        entry.refs += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.refs -= 1
+            if entry.refs == 0:
+                del self._session_locks[conv_key]
+
+    # ---------- 可用账户集合 ----------
+
+    def _ready_add(self, account: AccountManager):
+        account_id = account.config.account_id
+        if account_id not in self._ready_pos:
+            self._ready_pos[account_id] = len(self._ready)
+            self._ready.append(account)
+
+    def _ready_remove(self, account_id: str):
+        pos = self._ready_pos.pop(account_id, None)
+        if pos is None:
+            return
+        last = self._ready.pop()
+        if last.config.account_id != account_id:
+            self._ready[pos] = last
+            self._ready_pos[last.config.account_id] = pos
+
+    def set_rate_limit(self, per_minute: int):
+        """设置单账户每分钟请求数上限"""
+        if per_minute == self.rate_limit_per_minute:
+            return
+        self.rate_limit_per_minute = per_minute
+        for account in self.accounts.values():
+            account.rate_limiter.set_max_capacity(per_minute)
+        self.refresh_all_accounts()
+
+    def set_scheduler(self, policy_name: str):
+        """切换调度策略"""
+        if policy_name != self.scheduler.name:
+            self.scheduler = create_scheduler(policy_name)
+            logger.info(f"[MULTI] 调度策略: {self.scheduler.name}")
+
+    def _schedule(self, account_id: str, due: Optional[float]):
+        """设置账户的下一次重新判定时间（None 表示不需要）"""
+        if due is None:
+            self._timer_due.pop(account_id, None)
+        elif self._timer_due.get(account_id) != due:
+            self._timer_due[account_id] = due
+            heapq.heappush(self._timers, (due, account_id))
+            # 账户在限流/可用之间反复切换会留下大量过期条目，超过有效条目时重建堆（均摊 O(1)）
+            if len(self._timers) > 2 * len(self._timer_due) + TIMER_HEAP_COMPACT_SLACK:
+                self._timers = [(timer_due, timer_id) for timer_id, timer_due in self._timer_due.items()]
+                heapq.heapify(self._timers)
+
+    def refresh_account(self, account: AccountManager):
+        """重新判定单个账户是否可用，并安排下一次定时判定"""
+        account_id = account.config.account_id
+        if self.accounts.get(account_id) is not account:
+            return
+
+        config = account.config
+        self._throttled.pop(account_id, None)
+        if config.disabled or config.is_expired():
+            self._ready_remove(account_id)
+            self._schedule(account_id, None)
+        elif account.should_retry():
+            wait = account.rate_limiter.wait_time()
+            if wait > 0:
+                # 令牌耗尽：补充出一个令牌时重新加入
+                self._ready_remove(account_id)
+                self._throttled[account_id] = account
+                self._schedule(account_id, time.time() + wait)
+            else:
+                self._ready_add(account)
+                # 设置了过期时间的账户，到期时移出
+                self._schedule(account_id, config.expires_ts)
+        else:
+            self._ready_remove(account_id)
+            if account.circuit.state == CIRCUIT_OPEN:
+                # 熔断中：退避时间到达时发起探测
+                due = account.circuit.open_until
+            elif account.last_429_time > 0:
+                # 429冷却中：冷却结束时重新加入
+                due = account.last_429_time + account.rate_limit_cooldown_seconds
+            else:
+                due = None
+            self._schedule(account_id, due)
+
+    def active_account_ids(self) -> set:
+        """未被手动禁用的账户ID（会话绑定只对这些账户保留）"""
+        return {account_id for account_id, account in self.accounts.items() if not account.config.disabled}
+
+    def ready_accounts(self) -> List[AccountManager]:
+        """当前可用账户（快照）"""
+        return list(self._ready)
+
+    def is_ready(self, account_id: str) -> bool:
+        """账户当前是否在可用账户集合中（O(1)）"""
+        return account_id in self._ready_pos
+
+    def refresh_all_accounts(self):
+        """全量重建可用账户集合（冷却时间等全局参数变化后调用）"""
+        for account in self.accounts.values():
+            self.refresh_account(account)
+
+    def _process_timers(self):
+        """处理已到期的定时器"""
+        now = time.time()
+        due_accounts = []
+        # 严格小于：判定条件是"超过冷却时间"，等于时仍不可用
+        while self._timers and self._timers[0][0] < now:
+            due, account_id = heapq.heappop(self._timers)
+            if self._timer_due.get(account_id) == due:
+                del self._timer_due[account_id]
+                due_accounts.append(account_id)
+        # 先取出再判定，判定中重新安排的定时器留到下一次处理
+        for account_id in due_accounts:
+            account = self.accounts.get(account_id)
+            if account is None:
+                continue
+            if account.circuit.probe_due(now):
+                self._start_probe(account)
+            else:
+                self.refresh_account(account)
+
+    def _start_probe(self, account: AccountManager):
+        """后台发起熔断探测（不阻塞当前的账户选择）"""
+        task = asyncio.create_task(account.probe())
+        self._probe_tasks.add(task)
+        task.add_done_callback(self._probe_tasks.discard)
+
+    async def refresh_expiring_jwts(self, concurrency: int = JWT_REFRESH_CONCURRENCY) -> int:
+        """提前刷新即将过期的 JWT（仅限可用且最近使用过的账户），返回刷新的账户数"""
+        now = time.time()
+        due = [
+            account for account in self.accounts.values()
+            if account.jwt_manager is not None
+            and account.is_available
+            and account.circuit.is_closed
+            and not account.config.disabled
+            and not account.config.is_expired(now)
+            and account.jwt_manager.needs_background_refresh(now)
+        ]
+        if not due:
+            return 0
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def refresh_one(account: AccountManager):
+            async with semaphore:
+                try:
+                    await account.jwt_manager.refresh_in_background()
+                except Exception as e:
+                    # 后台刷新失败不计入错误次数，过期后由请求路径重新获取
+                    logger.warning(f"[AUTH] [{account.config.account_id}] 后台刷新 JWT 失败: {type(e).__name__}")
+
+        await asyncio.gather(*(refresh_one(account) for account in due))
+        return len(due)
 
     def update_http_client(self, http_client):
         """更新所有账户使用的 http_client（用于代理变更后重建客户端）"""
@@ -264,6 +550,73 @@ class MultiAccountManager:
             if account_mgr.jwt_manager is not None:
                 account_mgr.jwt_manager.http_client = http_client
 
+    def remove_account(self, account_id: str):
+        """移除账户（从可用集合、限流集合和定时器中一并移除）"""
+        account = self.accounts.pop(account_id, None)
+        if account is None:
+            return
+        if account_id in self.account_list:
+            self.account_list.remove(account_id)
+        self._ready_remove(account_id)
+        self._throttled.pop(account_id, None)
+        self._timer_due.pop(account_id, None)
+        account.pool = None
+        logger.info(f"[MULTI] [ACCOUNT] 移除账户: {account_id}")
+
+    def update_account_config(self, config: AccountConfig) -> bool:
+        """原地更新账户配置，返回登录凭据是否变化
+
+        凭据未变化时 JWT 和运行时状态全部保留；凭据变化时丢弃 JWT 并清除错误状态
+        （429 冷却和限流是上游按账户计算的，继续保留）
+        """
+        account = self.accounts[config.account_id]
+        credentials_changed = account.config.credentials() != config.credentials()
+        account.config = config
+        if credentials_changed:
+            account.jwt_manager = None
+            account.error_count = 0
+            account.circuit.reset()
+            account.is_available = True
+        elif account.jwt_manager is not None:
+            account.jwt_manager.config = config
+        self.refresh_account(account)
+        return credentials_changed
+
+    def reconcile_accounts(
+        self,
+        configs: List[AccountConfig],
+        http_client,
+        user_agent: str,
+        account_failure_threshold: int,
+        rate_limit_cooldown_seconds: int,
+        global_stats: dict
+    ) -> Dict[str, List[str]]:
+        """按新配置增量更新账户：只增删改有变化的账户，返回各类变化的账户ID"""
+        new_ids = {config.account_id for config in configs}
+        changes: Dict[str, List[str]] = {"added": [], "removed": [], "updated": [], "credentials_changed": []}
+
+        for account_id in list(self.accounts):
+            if account_id not in new_ids:
+                self.remove_account(account_id)
+                changes["removed"].append(account_id)
+
+        for config in configs:
+            account = self.accounts.get(config.account_id)
+            if account is None:
+                self.add_account(config, http_client, user_agent, account_failure_threshold, rate_limit_cooldown_seconds, global_stats)
+                changes["added"].append(config.account_id)
+                continue
+            account.account_failure_threshold = account_failure_threshold
+            account.rate_limit_cooldown_seconds = rate_limit_cooldown_seconds
+            if account.config != config:
+                if self.update_account_config(config):
+                    changes["credentials_changed"].append(config.account_id)
+                changes["updated"].append(config.account_id)
+
+        # 账户顺序与配置文件保持一致
+        self.account_list = [config.account_id for config in configs]
+        return changes
+
     def add_account(self, config: AccountConfig, http_client, user_agent: str, account_failure_threshold: int, rate_limit_cooldown_seconds: int, global_stats: dict):
         """添加账户"""
         manager = AccountManager(config, http_client, user_agent, account_failure_threshold, rate_limit_cooldown_seconds)
@@ -272,10 +625,21 @@ class MultiAccountManager:
             manager.conversation_count = global_stats["account_conversations"].get(config.account_id, 0)
         self.accounts[config.account_id] = manager
         self.account_list.append(config.account_id)
+        manager.pool = self
+        manager.rate_limiter.set_max_capacity(self.rate_limit_per_minute)
+        self.refresh_account(manager)
         logger.info(f"[MULTI] [ACCOUNT] 添加账户: {config.account_id}")
 
-    async def get_account(self, account_id: Optional[str] = None, request_id: str = "") -> AccountManager:
-        """获取账户 (轮询或指定) - 优化锁粒度，减少竞争"""
+    async def get_account(
+        self,
+        account_id: Optional[str] = None,
+        request_id: str = "",
+        exclude: Optional[Container[str]] = None
+    ) -> AccountManager:
+        """获取账户 (轮询或指定) - 优化锁粒度，减少竞争
+
+        exclude: 不参与选择的账户ID（同一请求中已经尝试过的账户）
+        """
         req_tag = f"[req_{request_id}] " if request_id else ""
 
         # 如果指定了账户ID（无需锁）
@@ -287,27 +651,20 @@ class MultiAccountManager:
                 raise HTTPException(503, f"Account {account_id} temporarily unavailable")
             return account
 
-        # 轮询选择可用账户（无锁读取账户列表）
-        available_accounts = [
-            acc_id for acc_id in self.account_list
-            if self.accounts[acc_id].should_retry()
-            and not self.accounts[acc_id].config.is_expired()
-            and not self.accounts[acc_id].config.disabled
-        ]
-
-        if not available_accounts:
-            raise HTTPException(503, "No available accounts")
-
-        # 只在更新索引时加锁（最小化锁持有时间）
-        async with self._index_lock:
-            if not hasattr(self, '_available_index'):
-                self._available_index = 0
-
-            account_id = available_accounts[self._available_index % len(available_accounts)]
-            self._available_index = (self._available_index + 1) % len(available_accounts)
-
-        account = self.accounts[account_id]
-        logger.info(f"[MULTI] [ACCOUNT] {req_tag}选择账户: {account_id}")
+        # 按调度策略从可用账户集合中选择（先处理到期的冷却/过期定时器）
+        # 选择过程中没有 await，事件循环内天然原子，无需加锁
+        self._process_timers()
+        exclude = exclude or ()
+        account = self.scheduler.select(self._ready, exclude) if self._ready else None
+        if account is None:
+            # 所有账户都在限流等待中：选择最快恢复的账户，而不是直接拒绝请求
+            throttled = [acc for acc in self._throttled.values() if acc.config.account_id not in exclude]
+            if not throttled:
+                raise HTTPException(503, "No available accounts")
+            account = min(throttled, key=lambda acc: acc.rate_limiter.wait_time())
+            logger.warning(f"[MULTI] [ACCOUNT] {req_tag}所有账户已达到限流阈值，使用最快恢复的账户")
+
+        logger.info(f"[MULTI] [ACCOUNT] {req_tag}选择账户: {account.config.account_id}")
         return account
 
 
@@ -360,19 +717,9 @@ def get_account_id(acc: dict, index: int) -> str:
     return acc.get("id", f"account_{index}")
 
 
-def load_multi_account_config(
-    http_client,
-    user_agent: str,
-    account_failure_threshold: int,
-    rate_limit_cooldown_seconds: int,
-    session_cache_ttl_seconds: int,
-    global_stats: dict
-) -> MultiAccountManager:
-    """从文件或环境变量加载多账户配置"""
-    manager = MultiAccountManager(session_cache_ttl_seconds)
-
-    accounts_data = load_accounts_from_source()
-
+def parse_account_configs(accounts_data: list) -> List[AccountConfig]:
+    """解析账户配置列表"""
+    configs = []
     for i, acc in enumerate(accounts_data, 1):
         # 验证必需字段
         required_fields = ["secure_c_ses", "csesidx", "config_id"]
@@ -380,7 +727,7 @@ def load_multi_account_config(
         if missing_fields:
             raise ValueError(f"账户 {i} 缺少必需字段: {', '.join(missing_fields)}")
 
-        config = AccountConfig(
+        configs.append(AccountConfig(
             account_id=get_account_id(acc, i),
             secure_c_ses=acc["secure_c_ses"],
             host_c_oses=acc.get("host_c_oses"),
@@ -388,8 +735,22 @@ def load_multi_account_config(
             config_id=acc["config_id"],
             expires_at=acc.get("expires_at"),
             disabled=acc.get("disabled", False)  # 读取手动禁用状态，默认为 False
-        )
+        ))
+    return configs
+
 
+def load_multi_account_config(
+    http_client,
+    user_agent: str,
+    account_failure_threshold: int,
+    rate_limit_cooldown_seconds: int,
+    session_cache_ttl_seconds: int,
+    global_stats: dict
+) -> MultiAccountManager:
+    """从文件或环境变量加载多账户配置"""
+    manager = MultiAccountManager(session_cache_ttl_seconds)
+
+    for config in parse_account_configs(load_accounts_from_source()):
         # 过期账户也加载（前端显示用），API调用时通过 get_account() 的过滤逻辑会自动排除
         if config.is_expired():
             logger.info(f"[CONFIG] 账户 {config.account_id} 已过期，仅用于前端展示")
@@ -412,42 +773,29 @@ def reload_accounts(
     session_cache_ttl_seconds: int,
     global_stats: dict
 ) -> MultiAccountManager:
-    """重新加载账户配置（保留现有账户的运行时状态）"""
-    # 保存现有账户的运行时状态
-    old_states = {}
-    for account_id, account_mgr in multi_account_mgr.accounts.items():
-        old_states[account_id] = {
-            "is_available": account_mgr.is_available,
-            "last_error_time": account_mgr.last_error_time,
-            "last_429_time": account_mgr.last_429_time,
-            "error_count": account_mgr.error_count,
-            "conversation_count": account_mgr.conversation_count
-        }
-
-    # 清空会话缓存并重新加载配置
-    multi_account_mgr.global_session_cache.clear()
-    new_mgr = load_multi_account_config(
+    """重新加载账户配置（增量更新：未变化账户的 JWT、会话绑定和运行时状态原地保留）"""
+    configs = parse_account_configs(load_accounts_from_source())
+    changes = multi_account_mgr.reconcile_accounts(
+        configs,
         http_client,
         user_agent,
         account_failure_threshold,
         rate_limit_cooldown_seconds,
-        session_cache_ttl_seconds,
         global_stats
     )
+    multi_account_mgr.cache_ttl = session_cache_ttl_seconds
 
-    # 恢复现有账户的运行时状态
-    for account_id, state in old_states.items():
-        if account_id in new_mgr.accounts:
-            account_mgr = new_mgr.accounts[account_id]
-            account_mgr.is_available = state["is_available"]
-            account_mgr.last_error_time = state["last_error_time"]
-            account_mgr.last_429_time = state["last_429_time"]
-            account_mgr.error_count = state["error_count"]
-            account_mgr.conversation_count = state["conversation_count"]
-            logger.debug(f"[CONFIG] 账户 {account_id} 运行时状态已恢复")
-
-    logger.info(f"[CONFIG] 配置已重载，当前账户数: {len(new_mgr.accounts)}")
-    return new_mgr
+    # 只丢弃已删除、已禁用或凭据变化的账户的会话绑定
+    keep_ids = multi_account_mgr.active_account_ids() - set(changes["credentials_changed"])
+    removed = multi_account_mgr.global_session_cache.retain_accounts(keep_ids)
+    if removed:
+        logger.info(f"[CACHE] 清理 {removed} 个已失效账户的会话缓存")
+
+    logger.info(
+        f"[CONFIG] 配置已重载，当前账户数: {len(multi_account_mgr.accounts)}"
+        f"（新增 {len(changes['added'])}，删除 {len(changes['removed'])}，更新 {len(changes['updated'])}）"
+    )
+    return multi_account_mgr
 
 
 def update_accounts_config(
@@ -0,0 +1,62 @@
+"""熔断器模块
+
+账户连续失败后进入熔断（打开）状态，退避时间到达后进入半开状态，
+由后台探测（刷新一次 JWT）决定恢复还是继续熔断；
+连续熔断的退避时间指数增长，真实请求成功后清零
+"""
+import time
+from typing import Optional
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+# 退避时间：首次 30 秒，每次翻倍，最长 30 分钟
+CIRCUIT_BASE_BACKOFF_SECONDS = 30
+CIRCUIT_MAX_BACKOFF_SECONDS = 1800
+
+
+class CircuitBreaker:
+    """单账户熔断器"""
+    __slots__ = ("state", "trip_count", "open_until")
+
+    def __init__(self):
+        self.state = CIRCUIT_CLOSED
+        self.trip_count = 0  # 连续熔断次数（决定退避时间）
+        self.open_until = 0.0
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == CIRCUIT_CLOSED
+
+    def trip(self, now: Optional[float] = None) -> float:
+        """打开熔断器，返回本次退避秒数"""
+        now = time.time() if now is None else now
+        self.trip_count += 1
+        backoff = min(CIRCUIT_MAX_BACKOFF_SECONDS, CIRCUIT_BASE_BACKOFF_SECONDS * 2 ** (self.trip_count - 1))
+        self.state = CIRCUIT_OPEN
+        self.open_until = now + backoff
+        return backoff
+
+    def probe_due(self, now: Optional[float] = None) -> bool:
+        """退避时间已到，可以发起探测"""
+        now = time.time() if now is None else now
+        return self.state == CIRCUIT_OPEN and now >= self.open_until
+
+    def begin_probe(self):
+        self.state = CIRCUIT_HALF_OPEN
+
+    def close(self):
+        """探测成功：关闭熔断器（保留熔断次数，真实请求成功后才清零）"""
+        self.state = CIRCUIT_CLOSED
+
+    def reset(self):
+        """请求成功或手动启用：完全复位"""
+        self.state = CIRCUIT_CLOSED
+        self.trip_count = 0
+        self.open_until = 0.0
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        """距离下一次探测的剩余秒数"""
+        now = time.time() if now is None else now
+        return max(0.0, self.open_until - now)
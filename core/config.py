@@ -79,6 +79,18 @@ class AutoRegisterConfig(BaseModel):
     cron: str = Field(default="", description="Cron 表达式（5段）")
 
 
+class PerformanceConfig(BaseModel):
+    """性能优化配置"""
+    stream_low_latency: bool = Field(default=False, description="低延迟流式输出（content 闭合即推送，不等待整个响应对象）")
+    log_capacity: int = Field(default=3000, ge=500, le=100000, description="内存日志容量（条）")
+    scheduler_policy: str = Field(default="round_robin", description="账户调度策略（round_robin/least_in_flight/latency_ewma/token_bucket）")
+    account_rate_limit_per_minute: int = Field(default=30, ge=1, le=600, description="单账户每分钟请求数上限（遇到429后自动下调）")
+    session_hedge_delay_seconds: float = Field(default=3.0, ge=0, le=60, description="新对话创建 Session 超过该时长未返回时，并行在其他账户上再尝试一次（0 表示关闭）")
+    session_cache_max_size: int = Field(default=1000, ge=100, le=1000000, description="会话缓存最大条目数（超出时淘汰最久未使用的对话）")
+    session_store_enabled: bool = Field(default=False, description="会话绑定持久化到 SQLite（重启后已有对话继续使用原 Session）")
+    session_pool_size: int = Field(default=0, ge=0, le=10, description="每个活跃账户预创建的 Session 数（0 表示关闭）")
+
+
 class SecurityConfig(BaseModel):
     """安全配置（仅从环境变量读取，不可热更新）"""
     admin_key: str = Field(default="", description="管理员密钥（必需）")
@@ -99,6 +111,7 @@ class AppConfig(BaseModel):
     public_display: PublicDisplayConfig
     session: SessionConfig
     auto_register: AutoRegisterConfig
+    performance: PerformanceConfig
 
 
 # ==================== 配置管理器 ====================
@@ -185,6 +198,10 @@ class ConfigManager:
             **yaml_data.get("session", {})
         )
 
+        performance_config = PerformanceConfig(
+            **yaml_data.get("performance", {})
+        )
+
         auto_register_data = yaml_data.get("auto_register", {})
         enabled_value = auto_register_data.get("enabled")
         if enabled_value is None:
@@ -202,7 +219,8 @@ class ConfigManager:
             retry=retry_config,
             public_display=public_display_config,
             session=session_config,
-            auto_register=auto_register_config
+            auto_register=auto_register_config,
+            performance=performance_config
         )
 
     def _load_yaml(self) -> dict:
@@ -378,4 +396,8 @@ class _ConfigProxy:
     def auto_register(self):
         return config_manager.config.auto_register
 
+    @property
+    def performance(self):
+        return config_manager.config.performance
+
 config = _ConfigProxy()
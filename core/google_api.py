@@ -7,7 +7,8 @@ import logging
 import os
 import time
 import uuid
-from typing import TYPE_CHECKING, List
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, List
 
 import httpx
 from fastapi import HTTPException
@@ -49,6 +50,7 @@ async def make_request_with_jwt_retry(
     http_client: httpx.AsyncClient,
     user_agent: str,
     request_id: str = "",
+    track_errors: bool = True,
     **kwargs
 ) -> httpx.Response:
     """通用HTTP请求，自动处理JWT过期重试
@@ -60,12 +62,13 @@ async def make_request_with_jwt_retry(
         http_client: httpx客户端
         user_agent: User-Agent字符串
         request_id: 请求ID（用于日志）
+        track_errors: JWT 获取失败是否计入账户错误计数（见 AccountManager.get_jwt）
         **kwargs: 传递给httpx的其他参数（如json, headers等）
 
     Returns:
         httpx.Response对象
     """
-    jwt = await account_mgr.get_jwt(request_id)
+    jwt = await account_mgr.get_jwt(request_id, track_errors)
     headers = get_common_headers(jwt, user_agent)
 
     # 合并用户提供的headers（如果有）
@@ -81,9 +84,10 @@ async def make_request_with_jwt_retry(
     else:
         raise ValueError(f"Unsupported HTTP method: {method}")
 
-    # 如果401，刷新JWT后重试一次
+    # 如果401，丢弃缓存的签名密钥，重新获取JWT后重试一次
     if resp.status_code == 401:
-        jwt = await account_mgr.get_jwt(request_id)
+        account_mgr.invalidate_jwt()
+        jwt = await account_mgr.get_jwt(request_id, track_errors)
         headers = get_common_headers(jwt, user_agent)
         if extra_headers:
             headers.update(extra_headers)
@@ -96,15 +100,40 @@ async def make_request_with_jwt_retry(
     return resp
 
 
+@asynccontextmanager
+async def stream_request_with_jwt_retry(
+    account_mgr: "AccountManager",
+    url: str,
+    http_client: httpx.AsyncClient,
+    user_agent: str,
+    request_id: str = "",
+    **kwargs
+) -> AsyncIterator[httpx.Response]:
+    """流式 POST 请求，401 时丢弃签名密钥、重新获取 JWT 后在同一账户上重试一次
+
+    与 make_request_with_jwt_retry 相同，只是响应以流的方式交给调用方读取；
+    重试后仍然失败的响应原样交给调用方处理
+    """
+    for attempt in range(2):
+        jwt = await account_mgr.get_jwt(request_id)
+        async with http_client.stream("POST", url, headers=get_common_headers(jwt, user_agent), **kwargs) as resp:
+            if resp.status_code == 401 and attempt == 0:
+                account_mgr.invalidate_jwt()
+                req_tag = f"[req_{request_id}] " if request_id else ""
+                logger.warning(f"[API] [{account_mgr.config.account_id}] {req_tag}JWT 被拒绝，重新获取签名密钥后重试")
+                continue
+            yield resp
+            return
+
+
 async def create_google_session(
     account_manager: "AccountManager",
     http_client: httpx.AsyncClient,
     user_agent: str,
-    request_id: str = ""
+    request_id: str = "",
+    track_errors: bool = True
 ) -> str:
-    """创建Google Session"""
-    jwt = await account_manager.get_jwt(request_id)
-    headers = get_common_headers(jwt, user_agent)
+    """创建Google Session（track_errors 见 AccountManager.get_jwt）"""
     body = {
         "configId": account_manager.config.config_id,
         "additionalParams": {"token": "-"},
@@ -114,12 +143,19 @@ async def create_google_session(
     }
 
     req_tag = f"[req_{request_id}] " if request_id else ""
-    r = await http_client.post(
+    r = await make_request_with_jwt_retry(
+        account_manager,
+        "POST",
         f"{GEMINI_API_BASE}/locations/global/widgetCreateSession",
-        headers=headers,
+        http_client,
+        user_agent,
+        request_id,
+        track_errors,
         json=body,
     )
     if r.status_code != 200:
+        if r.status_code == 401:
+            account_manager.invalidate_jwt()
         logger.error(f"[SESSION] [{account_manager.config.account_id}] {req_tag}Session 创建失败: {r.status_code}")
         raise HTTPException(r.status_code, "createSession failed")
     sess_name = r.json()["session"]["name"]
@@ -137,9 +173,6 @@ async def upload_context_file(
     request_id: str = ""
 ) -> str:
     """上传文件到指定 Session，返回 fileId"""
-    jwt = await account_manager.get_jwt(request_id)
-    headers = get_common_headers(jwt, user_agent)
-
     # 生成随机文件名
     ext = mime_type.split('/')[-1] if '/' in mime_type else "bin"
     file_name = f"upload_{int(time.time())}_{uuid.uuid4().hex[:6]}.{ext}"
@@ -155,14 +188,20 @@ async def upload_context_file(
         }
     }
 
-    r = await http_client.post(
+    r = await make_request_with_jwt_retry(
+        account_manager,
+        "POST",
         f"{GEMINI_API_BASE}/locations/global/widgetAddContextFile",
-        headers=headers,
+        http_client,
+        user_agent,
+        request_id,
         json=body,
     )
 
     req_tag = f"[req_{request_id}] " if request_id else ""
     if r.status_code != 200:
+        if r.status_code == 401:
+            account_manager.invalidate_jwt()
         logger.error(f"[FILE] [{account_manager.config.account_id}] {req_tag}文件上传失败: {r.status_code}")
         raise HTTPException(r.status_code, f"Upload failed: {r.text}")
 
@@ -8,8 +8,9 @@ import hashlib
 import hmac
 import json
 import logging
+import random
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 import httpx
 from fastapi import HTTPException
@@ -19,6 +20,17 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# JWT 有效期（秒），留出余量避免临界过期
+JWT_LIFETIME_SECONDS = 270
+# 后台提前刷新：到期前 30 秒 + 0~20 秒随机抖动（分散各账户的刷新时间）
+JWT_REFRESH_MARGIN_SECONDS = 30
+JWT_REFRESH_JITTER_SECONDS = 20
+# 最近 30 分钟内使用过的账户才会后台刷新
+JWT_ACTIVE_WINDOW_SECONDS = 1800
+# xsrf 签名密钥的缓存时长：初始 1 小时，密钥被拒绝（401）时按实际存活时间下调
+XSRF_KEY_DEFAULT_MAX_AGE_SECONDS = 3600
+XSRF_KEY_MIN_MAX_AGE_SECONDS = JWT_LIFETIME_SECONDS
+
 
 def urlsafe_b64encode(data: bytes) -> str:
     return base64.urlsafe_b64encode(data).decode().rstrip("=")
@@ -55,7 +67,12 @@ def create_jwt(key_bytes: bytes, key_id: str, csesidx: str) -> str:
 class JWTManager:
     """JWT token管理器
 
-    负责JWT的获取、刷新和缓存
+    负责JWT的获取、刷新和缓存。getoxsrf 返回的签名密钥单独缓存，
+    JWT 过期时优先用缓存的密钥在本地重新签发（一次 HMAC），
+    只有密钥被拒绝或超过缓存时长时才重新请求 getoxsrf。
+
+    读取不加锁：token 有效时直接返回；进入提前刷新区间时照常返回当前 token，
+    同时在后台刷新（stale-while-revalidate）；并发的 getoxsrf 请求合并为一个共享任务
     """
     def __init__(self, config: "AccountConfig", http_client: httpx.AsyncClient, user_agent: str) -> None:
         self.config = config
@@ -63,17 +80,83 @@ class JWTManager:
         self.user_agent = user_agent
         self.jwt: str = ""
         self.expires: float = 0
-        self._lock = asyncio.Lock()
+        self.refresh_at: float = 0  # 后台提前刷新的时间点
+        self.last_used: float = 0  # 最近一次被请求使用的时间
+        # 缓存的签名密钥
+        self._key_bytes: bytes = b""
+        self._key_id: str = ""
+        self.key_fetched_at: float = 0
+        self.key_max_age: float = XSRF_KEY_DEFAULT_MAX_AGE_SECONDS
+        self._fetch_task: Optional[asyncio.Task] = None  # 进行中的 getoxsrf 请求（所有等待者共享）
 
     async def get(self, request_id: str = "") -> str:
         """获取JWT token（自动刷新）"""
-        async with self._lock:
-            if time.time() > self.expires:
-                await self._refresh(request_id)
+        now = time.time()
+        self.last_used = now
+        if now < self.expires:
+            if now >= self.refresh_at:
+                self._revalidate()
             return self.jwt
-
-    async def _refresh(self, request_id: str = "") -> None:
-        """刷新JWT token"""
+        await self._refresh(request_id)
+        return self.jwt
+
+    def _revalidate(self) -> None:
+        """token 临近过期：密钥有效就地重新签发，否则后台获取新密钥，不阻塞当前请求"""
+        if self.key_valid(time.time()):
+            self._mint()
+        elif self._fetch_task is None or self._fetch_task.done():
+            task = asyncio.create_task(self._refresh())
+            task.add_done_callback(self._log_revalidate_result)
+
+    def _log_revalidate_result(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"[AUTH] [{self.config.account_id}] 后台刷新 JWT 失败: {type(task.exception()).__name__}")
+
+    def needs_background_refresh(self, now: float) -> bool:
+        """是否应由后台提前刷新（已持有 token、临近过期且最近被使用过）"""
+        return bool(self.jwt) and now >= self.refresh_at and now - self.last_used < JWT_ACTIVE_WINDOW_SECONDS
+
+    async def refresh_in_background(self) -> None:
+        """后台提前刷新（期间到达的请求继续使用当前 token）"""
+        if time.time() < self.refresh_at:
+            return  # 已被请求路径刷新过
+        await self._refresh()
+
+    def key_valid(self, now: float) -> bool:
+        """缓存的签名密钥是否仍可用于本地签发"""
+        return bool(self._key_bytes) and now - self.key_fetched_at < self.key_max_age
+
+    def invalidate_key(self) -> None:
+        """上游拒绝了当前 JWT（401）：丢弃密钥和 token，并按实际存活时间缩短缓存时长"""
+        if not self._key_bytes:
+            return
+        age = time.time() - self.key_fetched_at
+        self.key_max_age = max(XSRF_KEY_MIN_MAX_AGE_SECONDS, min(self.key_max_age, age * 0.8))
+        self._key_bytes = b""
+        self.jwt = ""
+        self.expires = 0
+        logger.info(f"[AUTH] [{self.config.account_id}] 签名密钥被拒绝，缓存时长调整为 {self.key_max_age:.0f} 秒")
+
+    async def _refresh(self, request_id: str = "", force_fetch: bool = False) -> None:
+        """刷新JWT token（密钥有效时本地签发，否则先获取新密钥）"""
+        if force_fetch or not self.key_valid(time.time()):
+            # single-flight：已有请求在获取密钥时直接等待它的结果
+            if self._fetch_task is None or self._fetch_task.done():
+                self._fetch_task = asyncio.create_task(self._fetch_key(request_id))
+                # 所有等待者都被取消时也要取走异常，避免未处理异常告警
+                self._fetch_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            # shield：单个等待者被取消不影响其他等待者共享的请求
+            await asyncio.shield(self._fetch_task)
+        self._mint()
+
+    def _mint(self) -> None:
+        """用缓存的密钥签发新 JWT"""
+        self.jwt = create_jwt(self._key_bytes, self._key_id, self.config.csesidx)
+        self.expires = time.time() + JWT_LIFETIME_SECONDS
+        self.refresh_at = self.expires - JWT_REFRESH_MARGIN_SECONDS - random.uniform(0, JWT_REFRESH_JITTER_SECONDS)
+
+    async def _fetch_key(self, request_id: str = "") -> None:
+        """请求 getoxsrf 获取签名密钥"""
         cookie = f"__Secure-C_SES={self.config.secure_c_ses}"
         if self.config.host_c_oses:
             cookie += f"; __Host-C_OSES={self.config.host_c_oses}"
@@ -95,7 +178,7 @@ class JWTManager:
         txt = r.text[4:] if r.text.startswith(")]}'") else r.text
         data = json.loads(txt)
 
-        key_bytes = base64.urlsafe_b64decode(data["xsrfToken"] + "==")
-        self.jwt      = create_jwt(key_bytes, data["keyId"], self.config.csesidx)
-        self.expires = time.time() + 270
-        logger.info(f"[AUTH] [{self.config.account_id}] {req_tag}JWT 刷新成功")
+        self._key_bytes = base64.urlsafe_b64decode(data["xsrfToken"] + "==")
+        self._key_id = data["keyId"]
+        self.key_fetched_at = time.time()
+        logger.info(f"[AUTH] [{self.config.account_id}] {req_tag}JWT 签名密钥获取成功")
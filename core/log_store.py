@@ -0,0 +1,204 @@
+"""内存日志存储模块
+
+按列保存最近 N 条日志（时间 / 级别 / 消息），写入时维护：
+- 各级别的计数（统计无需遍历）
+- 各级别的序号索引（按级别过滤只访问命中的日志）
+- 有序的时间列（时间范围过滤用二分查找定位）
+每条日志有单调递增的序号，作为分页游标使用
+"""
+from bisect import bisect_left, bisect_right
+from collections import deque
+from threading import Lock
+from typing import Dict, List, Optional
+
+# 默认日志容量
+DEFAULT_LOG_CAPACITY = 3000
+
+# 错误级别
+ERROR_LEVELS = ("ERROR", "CRITICAL")
+
+# 最近错误保留条数
+RECENT_ERRORS = 10
+
+
+class LogStore:
+    """列式内存日志存储（线程安全）
+
+    列使用普通列表追加，超出容量的旧数据先在逻辑上淘汰，
+    累积到一定数量后再一次性从列表头部裁剪，写入均摊 O(1)。
+    """
+    def __init__(self, capacity: int = DEFAULT_LOG_CAPACITY):
+        self.capacity = capacity
+        self._lock = Lock()
+        self._reset()
+
+    def _reset(self):
+        self._base = 0  # 列表第 0 个元素的序号
+        self._start = 0  # 窗口起点下限（扩容后已淘汰的日志不再可见）
+        self._next_seq = 0  # 下一条日志的序号
+        self._times: List[str] = []
+        self._levels: List[str] = []
+        self._messages: List[str] = []
+        self._lowered: List[str] = []  # 小写消息（搜索用）
+        self._level_seqs: Dict[str, List[int]] = {}
+        self._level_counts: Dict[str, int] = {}
+        self._recent_errors: deque = deque(maxlen=RECENT_ERRORS)
+
+    # ---------- 写入 ----------
+
+    def append(self, time_str: str, level: str, message: str):
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._times.append(time_str)
+            self._levels.append(level)
+            self._messages.append(message)
+            self._lowered.append(message.lower())
+            self._level_seqs.setdefault(level, []).append(seq)
+            self._level_counts[level] = self._level_counts.get(level, 0) + 1
+            if level in ERROR_LEVELS:
+                self._recent_errors.append(seq)
+
+            # 逻辑淘汰：窗口外的那一条从计数中扣除
+            evicted = seq - self.capacity
+            if evicted >= self._start:
+                self._level_counts[self._levels[evicted - self._base]] -= 1
+                # 累积足够多再物理裁剪，避免每次都移动整个列表
+                if evicted - self._base + 1 >= max(self.capacity // 4, 256):
+                    self._compact()
+
+    def _compact(self):
+        """裁剪已淘汰的数据（调用方持有锁）"""
+        start = self._window_start()
+        cut = start - self._base
+        if cut <= 0:
+            return
+        del self._times[:cut]
+        del self._levels[:cut]
+        del self._messages[:cut]
+        del self._lowered[:cut]
+        for level, seqs in list(self._level_seqs.items()):
+            del seqs[:bisect_left(seqs, start)]
+            if not seqs:
+                del self._level_seqs[level]
+                self._level_counts.pop(level, None)
+        self._start = self._base = start
+
+    def _window_start(self) -> int:
+        return max(self._start, self._next_seq - self.capacity)
+
+    def resize(self, capacity: int):
+        """调整容量（缩小时立即淘汰多余日志，扩容只影响之后的写入）"""
+        with self._lock:
+            if capacity == self.capacity:
+                return
+            # 已在逻辑上淘汰、尚未物理裁剪的日志不能因扩容重新可见
+            self._start = self._window_start()
+            self.capacity = capacity
+            start = self._window_start()
+            self._level_counts = {
+                level: len(seqs) - bisect_left(seqs, start)
+                for level, seqs in self._level_seqs.items()
+            }
+            self._compact()
+
+    def clear(self) -> int:
+        """清空日志，返回清除的条数"""
+        with self._lock:
+            cleared = self._next_seq - self._window_start()
+            next_seq = self._next_seq
+            self._reset()
+            # 序号继续递增，旧游标不会指向新日志
+            self._start = self._base = self._next_seq = next_seq
+            return cleared
+
+    # ---------- 查询 ----------
+
+    def _entry(self, seq: int) -> dict:
+        idx = seq - self._base
+        return {
+            "id": seq,
+            "time": self._times[idx],
+            "level": self._levels[idx],
+            "message": self._messages[idx]
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._next_seq - self._window_start()
+
+    def stats(self) -> dict:
+        """各级别计数和最近错误（不遍历日志）"""
+        with self._lock:
+            start = self._window_start()
+            by_level = {level: count for level, count in self._level_counts.items() if count}
+            recent_errors = [self._entry(seq) for seq in self._recent_errors if seq >= start]
+            return {
+                "total": self._next_seq - start,
+                "capacity": self.capacity,
+                "by_level": by_level,
+                "error_count": sum(by_level.get(level, 0) for level in ERROR_LEVELS),
+                "recent_errors": recent_errors
+            }
+
+    def error_count(self) -> int:
+        with self._lock:
+            return sum(self._level_counts.get(level, 0) for level in ERROR_LEVELS)
+
+    def query(
+        self,
+        limit: int = 100,
+        level: Optional[str] = None,
+        search: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        before: Optional[int] = None,
+        after: Optional[int] = None
+    ) -> dict:
+        """过滤 + 游标分页查询
+
+        默认返回满足条件的最新 limit 条；before 向前翻页（更旧），after 向后翻页（更新）。
+        返回的日志按时间正序排列。
+        """
+        with self._lock:
+            lo = self._window_start()
+            hi = self._next_seq
+            if after is not None:
+                lo = max(lo, after + 1)
+            if before is not None:
+                hi = min(hi, before)
+
+            # 时间范围：时间列有序，二分定位
+            if start_time:
+                lo = max(lo, self._base + bisect_left(self._times, start_time, lo - self._base))
+            if end_time:
+                hi = min(hi, self._base + bisect_right(self._times, end_time, lo - self._base))
+
+            if lo >= hi:
+                return {"logs": [], "has_more": False}
+
+            # 候选序号：按级别过滤时只访问该级别的索引
+            if level:
+                seqs = self._level_seqs.get(level, [])
+                candidates = seqs[bisect_left(seqs, lo):bisect_left(seqs, hi)]
+            else:
+                candidates = range(lo, hi)
+
+            needle = search.lower() if search else None
+            base = self._base
+            lowered = self._lowered
+            ordered = candidates if after is not None else reversed(candidates)
+
+            picked = []
+            has_more = False
+            for seq in ordered:
+                if needle and needle not in lowered[seq - base]:
+                    continue
+                if len(picked) >= limit:
+                    has_more = True
+                    break
+                picked.append(seq)
+
+            if after is None:
+                picked.reverse()
+            return {"logs": [self._entry(seq) for seq in picked], "has_more": has_more}
@@ -7,7 +7,7 @@ import base64
 import hashlib
 import logging
 import re
-from typing import List, TYPE_CHECKING
+from typing import List, Tuple, TYPE_CHECKING, Union
 
 import httpx
 
@@ -16,8 +16,56 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# 对话指纹只取每条消息文本的首尾片段（字符数），长消息和图片不会被整体复制或哈希
+FINGERPRINT_HEAD_CHARS = 512
+FINGERPRINT_TAIL_CHARS = 128
+# 截取片段时多取的字符数，用于去除首尾空白后仍有完整的片段
+FINGERPRINT_WHITESPACE_SLACK = 64
 
-def get_conversation_key(messages: List[dict], client_identifier: str = "") -> str:
+
+def _fingerprint_text(content) -> Tuple[str, str, int]:
+    """提取消息文本用于指纹：返回 (开头片段, 结尾片段, 去除首尾空白后的长度)
+
+    多模态消息只读取文本部分，图片等附件数据不会被访问
+    """
+    if isinstance(content, list):
+        parts = [x.get("text", "") for x in content if x.get("type") == "text"]
+    else:
+        parts = [content if isinstance(content, str) else str(content)]
+
+    length = sum(len(part) for part in parts)
+    # 按片段拼接开头和结尾，不拼接全文
+    head_limit = FINGERPRINT_HEAD_CHARS + FINGERPRINT_WHITESPACE_SLACK
+    head = ""
+    for part in parts:
+        head += part[:head_limit - len(head)]
+        if len(head) >= head_limit:
+            break
+    if length <= head_limit:
+        # 短消息：开头片段就是全文
+        text = head.strip()
+        return text.lower(), "", len(text)
+
+    tail_limit = FINGERPRINT_TAIL_CHARS + FINGERPRINT_WHITESPACE_SLACK
+    tail = ""
+    for part in reversed(parts):
+        if part:
+            tail = part[-(tail_limit - len(tail)):] + tail
+        if len(tail) >= tail_limit:
+            break
+
+    # 标准化：去除首尾空白（长度同步扣除），转小写
+    stripped_head = head.lstrip()
+    stripped_tail = tail.rstrip()
+    length -= (len(head) - len(stripped_head)) + (len(tail) - len(stripped_tail))
+    return (
+        stripped_head[:FINGERPRINT_HEAD_CHARS].lower(),
+        stripped_tail[-FINGERPRINT_TAIL_CHARS:].lower(),
+        max(length, 0)
+    )
+
+
+def get_conversation_key(messages: List[Union["Message", dict]], client_identifier: str = "") -> str:
     """
     生成对话指纹（使用前3条消息+客户端标识，确保唯一性）
 
@@ -25,39 +73,32 @@ def get_conversation_key(messages: List[dict], client_identifier: str = "") -> s
     1. 使用前3条消息生成指纹（而非仅第1条）
     2. 加入客户端标识（IP或request_id）避免不同用户冲突
     3. 保持Session复用能力（同一用户的后续消息仍能找到同一Session）
+    4. 每条消息只哈希角色、文本首尾片段和文本长度，直接读取 Message 对象，无需 model_dump
 
     Args:
-        messages: 消息列表
+        messages: 消息列表（Message 对象或字典）
         client_identifier: 客户端标识（如IP地址或request_id），用于区分不同用户
     """
     if not messages:
         return f"{client_identifier}:empty" if client_identifier else "empty"
 
-    # 提取前3条消息的关键信息（角色+内容）
-    message_fingerprints = []
+    digest = hashlib.blake2b(digest_size=16)
+    if client_identifier:
+        digest.update(client_identifier.encode())
     for msg in messages[:3]:  # 只取前3条
-        role = msg.get("role", "")
-        content = msg.get("content", "")
-
-        # 统一处理内容格式（字符串或数组）
-        if isinstance(content, list):
-            # 多模态消息：只提取文本部分
-            text = extract_text_from_content(content)
+        if isinstance(msg, dict):
+            role, content = msg.get("role", ""), msg.get("content", "")
         else:
-            text = str(content)
-
-        # 标准化：去除首尾空白，转小写
-        text = text.strip().lower()
-
-        # 组合角色和内容
-        message_fingerprints.append(f"{role}:{text}")
-
-    # 使用前3条消息+客户端标识生成指纹
-    conversation_prefix = "|".join(message_fingerprints)
-    if client_identifier:
-        conversation_prefix = f"{client_identifier}|{conversation_prefix}"
-
-    return hashlib.md5(conversation_prefix.encode()).hexdigest()
+            role, content = msg.role, msg.content
+        head, tail, length = _fingerprint_text(content)
+        # 各字段以长度前缀分隔，避免不同拆分得到相同的输入
+        for field in (role, head, tail):
+            encoded = field.encode()
+            digest.update(len(encoded).to_bytes(4, "little"))
+            digest.update(encoded)
+        digest.update(length.to_bytes(8, "little"))
+
+    return digest.hexdigest()
 
 
 def extract_text_from_content(content) -> str:
@@ -0,0 +1,73 @@
+"""账户限流模块
+
+每个账户一个自适应令牌桶，在分配请求前预估账户是否会触发上游 429：
+- 桶容量即每分钟允许的请求数，令牌按 容量/60 每秒匀速补充
+- 遇到 429：容量减半并清空令牌（乘性减）
+- 请求成功：容量缓慢增加，直到上限（加性增）
+这样账户的实际限额无需预先知道，会在 429 附近自动收敛
+"""
+import time
+from typing import Optional
+
+# 默认令牌桶参数（每分钟请求数）
+DEFAULT_RATE_LIMIT_PER_MINUTE = 30
+MIN_BUCKET_CAPACITY = 1.0
+# 每次成功增加的容量
+CAPACITY_INCREASE_STEP = 0.5
+# 遇到 429 时的容量缩减系数
+CAPACITY_DECREASE_FACTOR = 0.5
+
+
+class AdaptiveTokenBucket:
+    """自适应令牌桶（惰性补充：只在读取/消耗时按经过的时间补充令牌）"""
+    __slots__ = ("max_capacity", "capacity", "tokens", "updated_at")
+
+    def __init__(self, max_capacity: float = DEFAULT_RATE_LIMIT_PER_MINUTE):
+        self.max_capacity = float(max_capacity)
+        self.capacity = self.max_capacity
+        self.tokens = self.capacity
+        self.updated_at = time.time()
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / 60
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+            self.updated_at = now
+
+    def available(self, now: Optional[float] = None) -> float:
+        """当前可用令牌数"""
+        self._refill(time.time() if now is None else now)
+        return self.tokens
+
+    def wait_time(self, now: Optional[float] = None) -> float:
+        """距离有一个完整令牌还需等待的秒数（0 表示现在就可用）"""
+        tokens = self.available(now)
+        if tokens >= 1:
+            return 0.0
+        return (1 - tokens) / self.refill_per_second
+
+    def consume(self, amount: float = 1.0, now: Optional[float] = None):
+        """消耗令牌（不足时扣到 0，不阻塞）"""
+        self._refill(time.time() if now is None else now)
+        self.tokens = max(0.0, self.tokens - amount)
+
+    def on_success(self):
+        """请求成功：加性增加容量"""
+        if self.capacity < self.max_capacity:
+            self.capacity = min(self.max_capacity, self.capacity + CAPACITY_INCREASE_STEP)
+
+    def on_rate_limited(self, now: Optional[float] = None):
+        """遇到 429：乘性减少容量并清空令牌"""
+        self._refill(time.time() if now is None else now)
+        self.capacity = max(MIN_BUCKET_CAPACITY, self.capacity * CAPACITY_DECREASE_FACTOR)
+        self.tokens = 0.0
+
+    def set_max_capacity(self, max_capacity: float):
+        """调整容量上限（已学习到的容量不超过新上限）"""
+        self.max_capacity = float(max_capacity)
+        self.capacity = min(self.capacity, self.max_capacity)
+        self.tokens = min(self.tokens, self.capacity)
@@ -0,0 +1,171 @@
+"""请求追踪模块
+
+chat 处理流程在关键节点直接写入类型化的生命周期事件
+（开始、选择账户、创建会话、重试、切换、首字、完成），
+公开日志和管理面板直接读取这里的记录，读路径上没有任何字符串解析
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional
+
+# 北京时区 UTC+8
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+# 最多保留的请求记录数量（/public/log 的 limit 上限为 1000）
+MAX_TRACKED_REQUESTS = 1000
+
+# 事件类型
+EVENT_START = "start"
+EVENT_SELECT = "select"
+EVENT_SESSION = "session"
+EVENT_RETRY = "retry"
+EVENT_SWITCH = "switch"
+EVENT_FIRST_TOKEN = "first_token"
+EVENT_COMPLETE = "complete"
+
+# 完成状态
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_SUCCESS = "success"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+
+_COMPLETE_CONTENT = {
+    STATUS_ERROR: "请求失败",
+    STATUS_TIMEOUT: "请求超时",
+}
+
+
+def _now_str() -> str:
+    return datetime.now(BEIJING_TZ).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class RequestTrace:
+    """单个请求的生命周期记录"""
+    __slots__ = (
+        "request_id", "start_time", "started_at", "model", "message_count",
+        "status", "events", "select_count", "retry_count",
+    )
+
+    def __init__(self, request_id: str, model: str, message_count: int):
+        self.request_id = request_id
+        self.start_time = _now_str()
+        self.started_at = time.time()
+        self.model = model
+        self.message_count = message_count
+        self.status = STATUS_IN_PROGRESS
+        self.events: List[dict] = [{
+            "time": self.start_time,
+            "type": EVENT_START,
+            "content": f"{model} | {message_count}条消息" if message_count else model
+        }]
+        self.select_count = 0
+        self.retry_count = 0
+
+    def add(self, event_type: str, content: str, **extra) -> None:
+        event = {"time": _now_str(), "type": event_type, "content": content}
+        if extra:
+            event.update(extra)
+        self.events.append(event)
+
+    def to_dict(self) -> dict:
+        return {
+            "request_id": self.request_id,
+            "start_time": self.start_time,
+            "status": self.status,
+            "events": list(self.events)
+        }
+
+
+class RequestTraceStore:
+    """请求追踪记录存储（按请求开始顺序保留最近 N 个）
+
+    只在事件循环中调用，不需要加锁。
+    事件内容均为脱敏文本（不包含账户ID），可直接用于公开日志。
+    """
+    def __init__(self, max_requests: int = MAX_TRACKED_REQUESTS):
+        self.max_requests = max_requests
+        self._traces: "OrderedDict[str, RequestTrace]" = OrderedDict()
+        self.started_count = 0  # 累计开始的请求数（清空日志时重置）
+
+    def _get(self, request_id: str) -> Optional[RequestTrace]:
+        return self._traces.get(request_id)
+
+    def start(self, request_id: str, model: str, message_count: int) -> None:
+        """请求开始"""
+        self._traces[request_id] = RequestTrace(request_id, model, message_count)
+        self.started_count += 1
+        if len(self._traces) > self.max_requests:
+            self._traces.popitem(last=False)
+
+    def account_selected(self, request_id: str) -> None:
+        """选择账户：第一次显示为选择服务节点，之后显示为切换服务节点"""
+        trace = self._get(request_id)
+        if trace is None:
+            return
+        trace.select_count += 1
+        if trace.select_count == 1:
+            trace.add(EVENT_SELECT, "选择服务节点")
+        else:
+            trace.add(EVENT_SWITCH, "切换服务节点")
+
+    def session_created(self, request_id: str) -> None:
+        """新会话创建成功"""
+        trace = self._get(request_id)
+        if trace is not None:
+            trace.add(EVENT_SESSION, "会话已创建")
+
+    def retry(self, request_id: str) -> None:
+        """一次尝试失败，准备重试"""
+        trace = self._get(request_id)
+        if trace is None:
+            return
+        trace.retry_count += 1
+        trace.add(EVENT_RETRY, f"服务异常，正在重试（{trace.retry_count}）")
+
+    def switch(self, request_id: str) -> None:
+        """运行中切换账户"""
+        trace = self._get(request_id)
+        if trace is not None:
+            trace.select_count += 1
+            trace.add(EVENT_SWITCH, "切换服务节点")
+
+    def first_token(self, request_id: str) -> None:
+        """收到首个内容片段"""
+        trace = self._get(request_id)
+        if trace is not None:
+            latency = time.time() - trace.started_at
+            trace.add(EVENT_FIRST_TOKEN, f"首字延迟 {latency:.2f}s")
+
+    def complete(self, request_id: str, status: str, duration: Optional[float] = None) -> None:
+        """请求结束（成功后不再被后续的失败状态覆盖）"""
+        trace = self._get(request_id)
+        if trace is None or trace.status == STATUS_SUCCESS:
+            return
+        if trace.status != STATUS_IN_PROGRESS and status != STATUS_SUCCESS:
+            return
+        trace.status = status
+        if status == STATUS_SUCCESS:
+            content = f"响应完成 | 耗时{duration:.2f}s" if duration is not None else "响应完成"
+        else:
+            content = _COMPLETE_CONTENT.get(status, "请求失败")
+        trace.add(EVENT_COMPLETE, content, status=status)
+
+    def fail_if_pending(self, request_id: str) -> None:
+        """请求处理意外中断时兜底标记为失败"""
+        trace = self._get(request_id)
+        if trace is not None and trace.status == STATUS_IN_PROGRESS:
+            self.complete(request_id, STATUS_ERROR)
+
+    def recent(self, limit: int = 100) -> List[dict]:
+        """最近 limit 个请求（按开始时间倒序）"""
+        result = []
+        for trace in reversed(self._traces.values()):
+            result.append(trace.to_dict())
+            if len(result) >= limit:
+                break
+        return result
+
+    def clear(self) -> None:
+        self._traces.clear()
+        self.started_count = 0
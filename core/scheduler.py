@@ -0,0 +1,133 @@
+"""账户调度策略模块
+
+MultiAccountManager 从可用账户集合中选择账户时使用的策略：
+- round_robin: 按账户配置顺序轮询（默认）
+- least_in_flight: 优先选择正在处理请求最少的账户
+- latency_ewma: 按 延迟EWMA × (在途请求+1) 打分，优先选择低延迟且空闲的账户
+- token_bucket: 优先选择令牌桶剩余额度最多的账户（离限流最远）
+
+负载感知策略采用"二选一"随机采样（power of two choices）：
+随机取两个候选比较，选择成本 O(1)，负载分布接近全量取最优
+
+exclude 为同一请求中已经尝试过的账户ID，由策略在选择时跳过（调用方不必复制过滤可用账户列表）；
+没有可选账户时返回 None
+"""
+import logging
+import random
+from typing import TYPE_CHECKING, Callable, Container, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from core.account import AccountManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCHEDULER_POLICY = "round_robin"
+
+# 二选一策略带 exclude 时的随机抽样次数，用完仍不足两个候选再遍历过滤
+EXCLUDE_SAMPLE_ATTEMPTS = 8
+
+
+class SchedulerPolicy:
+    """调度策略基类"""
+    name = ""
+
+    def select(self, ready: List["AccountManager"], exclude: Container[str] = ()) -> Optional["AccountManager"]:
+        raise NotImplementedError
+
+
+class RoundRobinPolicy(SchedulerPolicy):
+    """轮询
+
+    可用账户集合删除时与末尾交换，顺序不稳定，所以按账户配置顺序轮转，
+    从上次选中的位置向后找第一个可用账户（账户状态变化不会打乱轮询顺序）；
+    可用性用 O(1) 查询判断，只会遍历被跳过的账户
+    """
+    name = "round_robin"
+
+    def __init__(self):
+        self._index = 0  # 下一次从账户配置顺序的哪个位置开始查找
+
+    def select(self, ready: List["AccountManager"], exclude: Container[str] = ()) -> Optional["AccountManager"]:
+        pool = ready[0].pool
+        order = pool.account_list
+        n = len(order)
+        for step in range(n):
+            position = (self._index + step) % n
+            account_id = order[position]
+            if pool.is_ready(account_id) and account_id not in exclude:
+                self._index = (position + 1) % n
+                return pool.accounts[account_id]
+        return None
+
+
+class TwoChoicesPolicy(SchedulerPolicy):
+    """二选一采样策略基类：子类实现 cost()，成本低者胜出"""
+
+    def cost(self, account: "AccountManager") -> float:
+        raise NotImplementedError
+
+    def select(self, ready: List["AccountManager"], exclude: Container[str] = ()) -> Optional["AccountManager"]:
+        if exclude:
+            candidates = self._sample_excluding(ready, exclude)
+        elif len(ready) == 1:
+            return ready[0]
+        else:
+            candidates = random.sample(ready, 2)
+        if len(candidates) < 2:
+            return candidates[0] if candidates else None
+        a, b = candidates
+        return a if self.cost(a) <= self.cost(b) else b
+
+    @staticmethod
+    def _sample_excluding(ready: List["AccountManager"], exclude: Container[str]) -> List["AccountManager"]:
+        """随机抽取至多两个未被排除的账户（排除的通常只有几个，先抽样，抽不满再遍历）"""
+        picked: List["AccountManager"] = []
+        for _ in range(EXCLUDE_SAMPLE_ATTEMPTS):
+            account = random.choice(ready)
+            if account.config.account_id not in exclude and account not in picked:
+                picked.append(account)
+                if len(picked) == 2:
+                    return picked
+        remaining = [acc for acc in ready if acc.config.account_id not in exclude]
+        return random.sample(remaining, min(2, len(remaining)))
+
+
+class LeastInFlightPolicy(TwoChoicesPolicy):
+    """在途请求最少优先"""
+    name = "least_in_flight"
+
+    def cost(self, account: "AccountManager") -> float:
+        return account.in_flight
+
+
+class LatencyEWMAPolicy(TwoChoicesPolicy):
+    """延迟EWMA加权（尚无样本的账户成本为 0，优先获得探测机会）"""
+    name = "latency_ewma"
+
+    def cost(self, account: "AccountManager") -> float:
+        return account.latency_ewma * (account.in_flight + 1)
+
+
+class TokenBucketPolicy(TwoChoicesPolicy):
+    """令牌桶剩余额度最多优先"""
+    name = "token_bucket"
+
+    def cost(self, account: "AccountManager") -> float:
+        return -account.rate_limiter.available()
+
+
+SCHEDULER_POLICIES: Dict[str, Callable[[], SchedulerPolicy]] = {
+    RoundRobinPolicy.name: RoundRobinPolicy,
+    LeastInFlightPolicy.name: LeastInFlightPolicy,
+    LatencyEWMAPolicy.name: LatencyEWMAPolicy,
+    TokenBucketPolicy.name: TokenBucketPolicy,
+}
+
+
+def create_scheduler(name: str) -> SchedulerPolicy:
+    """按名称创建调度策略（未知名称回退到轮询）"""
+    factory = SCHEDULER_POLICIES.get(name)
+    if factory is None:
+        logger.warning(f"[MULTI] 未知调度策略 {name}，使用 {DEFAULT_SCHEDULER_POLICY}")
+        factory = SCHEDULER_POLICIES[DEFAULT_SCHEDULER_POLICY]
+    return factory()
@@ -0,0 +1,133 @@
+"""会话缓存模块
+
+对话指纹 -> (账户, Google Session) 的绑定，基于 OrderedDict 实现 LRU：
+- 写入和续期时移动到末尾，条目始终按最近使用时间排列
+- 超出容量时从头部淘汰最久未使用的条目，O(1)
+- 读取时惰性检查过期；过期条目都集中在头部，后台清理只需从头部向后扫到第一个未过期条目
+- 可选挂接持久化存储（SessionBindingStore），写入、续期和淘汰同步记录到存储
+"""
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Container, Optional
+
+if TYPE_CHECKING:
+    from core.session_store import SessionBindingStore
+
+# 默认最大缓存条目数
+DEFAULT_SESSION_CACHE_MAX_SIZE = 1000
+# 后台清理间隔（秒）和单批处理的最大条目数
+SESSION_CACHE_SWEEP_INTERVAL_SECONDS = 60
+SESSION_CACHE_SWEEP_BATCH = 1000
+
+
+class SessionCache:
+    """带 TTL 的 LRU 会话缓存
+
+    条目格式: {"account_id": str, "session_id": str, "updated_at": float}
+    """
+    def __init__(self, ttl_seconds: int, max_size: int = DEFAULT_SESSION_CACHE_MAX_SIZE):
+        self.ttl = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.store: Optional["SessionBindingStore"] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, conv_key: str) -> bool:
+        return self.get(conv_key) is not None
+
+    def keys(self):
+        return self._entries.keys()
+
+    def get(self, conv_key: str) -> Optional[dict]:
+        """读取缓存（已过期的条目在此删除并返回 None）"""
+        entry = self._entries.get(conv_key)
+        if entry is None:
+            return None
+        if time.time() - entry["updated_at"] > self.ttl:
+            del self._entries[conv_key]
+            return None
+        return entry
+
+    def set(self, conv_key: str, account_id: str, session_id: str):
+        """写入绑定并标记为最近使用，超出容量时淘汰最久未使用的条目"""
+        self._entries[conv_key] = {
+            "account_id": account_id,
+            "session_id": session_id,
+            "updated_at": time.time()
+        }
+        self._entries.move_to_end(conv_key)
+        if self.store is not None:
+            self.store.put(conv_key, self._entries[conv_key])
+        while len(self._entries) > self.max_size:
+            self._evict_oldest()
+
+    def touch(self, conv_key: str):
+        """续期并标记为最近使用"""
+        entry = self._entries.get(conv_key)
+        if entry is not None:
+            entry["updated_at"] = time.time()
+            self._entries.move_to_end(conv_key)
+            if self.store is not None:
+                self.store.put(conv_key, entry)
+
+    def _evict_oldest(self):
+        conv_key, _ = self._entries.popitem(last=False)
+        if self.store is not None:
+            self.store.delete(conv_key)
+
+    def resize(self, max_size: int) -> int:
+        """调整容量，返回因缩小淘汰的条目数"""
+        self.max_size = max_size
+        evicted = 0
+        while len(self._entries) > max_size:
+            self._evict_oldest()
+            evicted += 1
+        return evicted
+
+    def retain_accounts(self, account_ids: Container[str]) -> int:
+        """只保留绑定到指定账户的条目（账户删除或禁用后调用），返回删除的条目数"""
+        removed = [key for key, entry in self._entries.items() if entry["account_id"] not in account_ids]
+        for conv_key in removed:
+            del self._entries[conv_key]
+            if self.store is not None:
+                self.store.delete(conv_key)
+        return len(removed)
+
+    def attach_store(self, store: "SessionBindingStore") -> int:
+        """挂接持久化存储：加载存储中未过期的绑定，并把内存中已有的绑定写入存储，返回加载的条目数"""
+        rows = store.load(self.ttl, self.max_size)
+        for conv_key, entry in self._entries.items():
+            store.put(conv_key, entry)
+        merged = {
+            conv_key: {"account_id": account_id, "session_id": session_id, "updated_at": updated_at}
+            for conv_key, account_id, session_id, updated_at in rows
+        }
+        # 内存中的绑定更新鲜，覆盖存储中的同一对话
+        merged.update(self._entries)
+        self._entries = OrderedDict(sorted(merged.items(), key=lambda item: item[1]["updated_at"]))
+        self.store = store
+        while len(self._entries) > self.max_size:
+            self._evict_oldest()
+        return len(rows)
+
+    def detach_store(self) -> Optional["SessionBindingStore"]:
+        """取消挂接，返回原存储"""
+        store, self.store = self.store, None
+        return store
+
+    def sweep(self, limit: int = SESSION_CACHE_SWEEP_BATCH) -> int:
+        """从头部清理过期条目（最多 limit 条），返回清理的条目数"""
+        deadline = time.time() - self.ttl
+        removed = 0
+        while removed < limit and self._entries:
+            conv_key, entry = next(iter(self._entries.items()))
+            if entry["updated_at"] >= deadline:
+                break
+            del self._entries[conv_key]
+            removed += 1
+        return removed
+
+    def clear(self):
+        self._entries.clear()
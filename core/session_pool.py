@@ -0,0 +1,146 @@
+"""Session 预创建池模块
+
+为每个账户预先创建少量未使用的 Google Session，新对话直接取用，
+省去首字前的一次 widgetCreateSession 往返：
+- 取用时丢弃超过存活时长的 Session（从未使用过的 Session 不再保留）
+- 后台任务按目标深度补充，只补充最近有新对话需求的可用账户
+- 补充失败的账户暂停一段时间再试，不影响账户本身的错误计数
+- 每个 Session 记录创建时的账户凭据，凭据变化（重新登录）后不再取用
+- 对冲落后的尝试创建的 Session 不受目标深度限制（预创建关闭时也保留），供下一个新对话取用
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from core.account import AccountManager, MultiAccountManager
+
+logger = logging.getLogger(__name__)
+
+# 默认每个账户预创建的 Session 数（0 表示关闭，需要在设置中开启）
+DEFAULT_SESSION_POOL_SIZE = 0
+# 预创建 Session 的最长保留时间（秒）
+SESSION_POOL_MAX_AGE_SECONDS = 1800
+# 最近 30 分钟内有新对话的账户才会补充
+SESSION_POOL_ACTIVE_WINDOW_SECONDS = 1800
+# 补充检查间隔、失败后的暂停时间（秒）和最大并发创建数
+SESSION_POOL_CHECK_INTERVAL_SECONDS = 10
+SESSION_POOL_RETRY_SECONDS = 60
+SESSION_POOL_FILL_CONCURRENCY = 4
+# 对冲回收的 Session：目标深度之外每个账户最多保留的数量
+SESSION_POOL_RECYCLE_LIMIT = 2
+
+
+class SessionPool:
+    """按账户划分的预创建 Session 池"""
+    def __init__(
+        self,
+        create_session: Callable[["AccountManager"], Awaitable[str]],
+        target_size: int = DEFAULT_SESSION_POOL_SIZE
+    ):
+        self._create_session = create_session
+        self.target_size = target_size
+        self._pools: Dict[str, Deque[Tuple[str, float, tuple]]] = {}  # 账户ID -> [(session_name, 创建时间, 账户凭据)]
+        self._last_demand: Dict[str, float] = {}  # 账户ID -> 最近一次取用时间
+        self._failed_at: Dict[str, float] = {}  # 账户ID -> 最近一次补充失败时间
+        self._filling: set = set()  # 正在补充的账户ID
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(SESSION_POOL_FILL_CONCURRENCY)
+
+    def pop(self, account: "AccountManager") -> Optional[str]:
+        """取出一个可用的预创建或回收的 Session（没有则返回 None，由调用方现场创建）"""
+        account_id = account.config.account_id
+        credentials = account.config.credentials()
+        now = time.time()
+        self._last_demand[account_id] = now
+        self._wakeup.set()
+        pool = self._pools.get(account_id)
+        while pool:
+            session_name, created_at, created_with = pool.popleft()
+            if now - created_at < SESSION_POOL_MAX_AGE_SECONDS and created_with == credentials:
+                return session_name
+        return None
+
+    def recycle(self, account: "AccountManager", session_name: str) -> bool:
+        """归还一个创建后未被使用的 Session（预创建关闭时也接收，超过回收上限时丢弃）"""
+        account_id = account.config.account_id
+        if account_id not in self._last_demand:
+            return False  # 账户已被丢弃
+        pool = self._pools.setdefault(account_id, deque())
+        if len(pool) >= max(self.target_size, SESSION_POOL_RECYCLE_LIMIT):
+            return False
+        pool.append((session_name, time.time(), account.config.credentials()))
+        return True
+
+    def discard(self, account_id: str):
+        """丢弃账户的预创建 Session（账户删除或凭据变化时调用）"""
+        self._pools.pop(account_id, None)
+        self._last_demand.pop(account_id, None)
+        self._failed_at.pop(account_id, None)
+
+    def set_target_size(self, target_size: int):
+        """调整每个账户的目标深度（缩小时丢弃超出回收上限的 Session）"""
+        self.target_size = target_size
+        limit = max(target_size, SESSION_POOL_RECYCLE_LIMIT)
+        for pool in self._pools.values():
+            while len(pool) > limit:
+                pool.pop()
+        self._wakeup.set()
+
+    async def wait_for_demand(self):
+        """等待下一次补充时机（有 Session 被取用时立即唤醒）"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), SESSION_POOL_CHECK_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def top_up(self, multi_account_mgr: "MultiAccountManager"):
+        """清理过期 Session，并为活跃的可用账户补充到目标深度"""
+        now = time.time()
+        for account_id in list(self._pools):
+            account = multi_account_mgr.accounts.get(account_id)
+            if account is None:
+                self.discard(account_id)
+                continue
+            credentials = account.config.credentials()
+            pool = self._pools[account_id]
+            if any(created_with != credentials for _, _, created_with in pool):
+                self._pools[account_id] = pool = deque(item for item in pool if item[2] == credentials)
+            while pool and now - pool[0][1] >= SESSION_POOL_MAX_AGE_SECONDS:
+                pool.popleft()
+
+        if self.target_size <= 0:
+            return
+
+        tasks = []
+        for account in multi_account_mgr.ready_accounts():
+            account_id = account.config.account_id
+            if account_id in self._filling:
+                continue
+            if now - self._last_demand.get(account_id, 0) >= SESSION_POOL_ACTIVE_WINDOW_SECONDS:
+                continue
+            if now - self._failed_at.get(account_id, 0) < SESSION_POOL_RETRY_SECONDS:
+                continue
+            if len(self._pools.get(account_id, ())) >= self.target_size:
+                continue
+            self._filling.add(account_id)
+            tasks.append(self._fill(account))
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def _fill(self, account: "AccountManager"):
+        account_id = account.config.account_id
+        try:
+            while len(self._pools.get(account_id, ())) < self.target_size:
+                credentials = account.config.credentials()
+                async with self._semaphore:
+                    session_name = await self._create_session(account)
+                self._pools.setdefault(account_id, deque()).append((session_name, time.time(), credentials))
+        except Exception as e:
+            self._failed_at[account_id] = time.time()
+            logger.warning(f"[SESSION] [{account_id}] 预创建 Session 失败: {type(e).__name__}")
+        finally:
+            self._filling.discard(account_id)
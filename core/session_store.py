@@ -0,0 +1,97 @@
+"""会话绑定持久化模块
+
+把 对话指纹 -> (账户, Google Session) 的绑定保存到 SQLite（WAL 模式），
+重启后已有对话可以继续使用原 Session，不必新建 Session 并重发完整上下文：
+- 内存中的 SessionCache 是前端，热路径只把变更记录到待写字典（同一对话的多次变更合并）
+- 后台任务定期在线程中批量写入，并按 TTL 删除过期的绑定
+- 启动时把未过期的最近绑定加载回内存
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 后台写入间隔（秒）
+SESSION_STORE_FLUSH_INTERVAL_SECONDS = 5
+
+
+class SessionBindingStore:
+    """SQLite 会话绑定存储"""
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        # 待写入的变更：conv_key -> (account_id, session_id, updated_at)，None 表示删除
+        self._pending: Dict[str, Optional[Tuple[str, str, float]]] = {}
+        self._flush_lock = asyncio.Lock()  # 串行化写入（连接同一时间只在一个线程中使用）
+
+    def open(self):
+        """打开数据库（不存在则创建）"""
+        # 写入在线程池中执行，连接需要允许跨线程使用（由 _flush_lock 保证串行）
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_bindings ("
+            "conv_key TEXT PRIMARY KEY, account_id TEXT NOT NULL, "
+            "session_id TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_session_bindings_updated_at ON session_bindings(updated_at)"
+        )
+        self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def load(self, ttl_seconds: int, limit: int) -> List[Tuple[str, str, str, float]]:
+        """读取未过期的最近 limit 条绑定，按更新时间从旧到新排列"""
+        rows = self._conn.execute(
+            "SELECT conv_key, account_id, session_id, updated_at FROM session_bindings "
+            "WHERE updated_at >= ? ORDER BY updated_at DESC LIMIT ?",
+            (time.time() - ttl_seconds, limit)
+        ).fetchall()
+        rows.reverse()
+        return rows
+
+    def put(self, conv_key: str, entry: dict):
+        """记录绑定的写入或续期"""
+        self._pending[conv_key] = (entry["account_id"], entry["session_id"], entry["updated_at"])
+
+    def delete(self, conv_key: str):
+        """记录绑定的删除"""
+        self._pending[conv_key] = None
+
+    async def flush(self, ttl_seconds: int):
+        """批量写入待写变更，并删除过期的绑定"""
+        async with self._flush_lock:
+            if self._conn is None:
+                return
+            batch, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(self._write, batch, time.time() - ttl_seconds)
+            except Exception as e:
+                # 写入失败：放回待写字典（期间又有新变更的对话以新变更为准）
+                for conv_key, value in batch.items():
+                    self._pending.setdefault(conv_key, value)
+                logger.error(f"[CACHE] 会话绑定写入失败: {str(e)[:50]}")
+
+    def _write(self, batch: Dict[str, Optional[Tuple[str, str, float]]], expire_before: float):
+        upserts = [(key,) + value for key, value in batch.items() if value is not None]
+        deletes = [(key,) for key, value in batch.items() if value is None]
+        with self._conn:
+            if upserts:
+                self._conn.executemany(
+                    "INSERT INTO session_bindings (conv_key, account_id, session_id, updated_at) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT(conv_key) DO UPDATE SET "
+                    "account_id = excluded.account_id, session_id = excluded.session_id, "
+                    "updated_at = excluded.updated_at",
+                    upserts
+                )
+            if deletes:
+                self._conn.executemany("DELETE FROM session_bindings WHERE conv_key = ?", deletes)
+            self._conn.execute("DELETE FROM session_bindings WHERE updated_at < ?", (expire_before,))
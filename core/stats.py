@@ -0,0 +1,186 @@
+"""统计数据模块
+
+负责请求/访客统计的内存维护和后台持久化：
+热路径只修改内存中的计数并标记为脏，由后台任务定期（以及关闭时）写盘
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import List, Optional
+
+import aiofiles
+
+logger = logging.getLogger(__name__)
+
+# 后台持久化间隔（秒）
+STATS_FLUSH_INTERVAL_SECONDS = 30
+
+
+def _default_stats() -> dict:
+    return {
+        "total_visitors": 0,
+        "total_requests": 0,
+        "visitor_ips": {},  # {ip: timestamp} 记录访问IP和时间
+        "account_conversations": {}  # {account_id: conversation_count} 账户对话次数
+    }
+
+
+class BucketRing:
+    """固定大小的时间分桶计数环
+
+    每个槽位记录自己所属的桶编号（时间戳 // bucket_seconds），
+    写入时发现槽位属于旧的一轮就原地清零复用，因此不需要任何清理任务。
+    """
+    def __init__(self, bucket_seconds: int, size: int):
+        self.bucket_seconds = bucket_seconds
+        self.size = size
+        self.counts: List[int] = [0] * size
+        self.buckets: List[int] = [-1] * size  # 槽位当前对应的桶编号
+
+    def add(self, now: float, count: int = 1):
+        """O(1) 记录"""
+        bucket = int(now) // self.bucket_seconds
+        idx = bucket % self.size
+        if self.buckets[idx] != bucket:
+            self.buckets[idx] = bucket
+            self.counts[idx] = 0
+        self.counts[idx] += count
+
+    def total(self, now: float, window_buckets: Optional[int] = None) -> int:
+        """最近 window_buckets 个桶（含当前桶）的计数之和，O(桶数)"""
+        window = min(window_buckets or self.size, self.size)
+        current = int(now) // self.bucket_seconds
+        oldest = current - window + 1
+        return sum(
+            count for bucket, count in zip(self.buckets, self.counts)
+            if oldest <= bucket <= current
+        )
+
+    def to_compact(self) -> List[List[int]]:
+        """紧凑持久化格式：只保存非零桶 [[bucket, count], ...]"""
+        return sorted(
+            [bucket, count] for bucket, count in zip(self.buckets, self.counts)
+            if bucket >= 0 and count
+        )
+
+    def load_compact(self, items: List[List[int]]):
+        for bucket, count in items:
+            idx = bucket % self.size
+            if bucket >= self.buckets[idx]:
+                self.buckets[idx] = bucket
+                self.counts[idx] = count
+
+
+class RequestRateCounter:
+    """请求速率计数器
+
+    用两组固定大小的分桶环替代不断增长的时间戳列表：
+    - 60 个 1 秒桶：计算每分钟请求数（RPM）
+    - 60 个 1 分钟桶：计算每小时请求数（RPH）
+    记录 O(1)，查询 O(桶数)，内存和持久化体积都是常量级。
+    """
+    def __init__(self):
+        self.seconds = BucketRing(1, 60)
+        self.minutes = BucketRing(60, 60)
+
+    def record(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self.seconds.add(now)
+        self.minutes.add(now)
+
+    def requests_per_minute(self, now: Optional[float] = None) -> int:
+        return self.seconds.total(time.time() if now is None else now)
+
+    def requests_per_hour(self, now: Optional[float] = None) -> int:
+        return self.minutes.total(time.time() if now is None else now)
+
+    def to_dict(self) -> dict:
+        return {"seconds": self.seconds.to_compact(), "minutes": self.minutes.to_compact()}
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "RequestRateCounter":
+        counter = cls()
+        if data:
+            counter.seconds.load_compact(data.get("seconds", []))
+            counter.minutes.load_compact(data.get("minutes", []))
+        return counter
+
+
+class StatsStore:
+    """统计数据存储
+
+    `data` 字典在整个进程生命周期内保持同一个对象（加载时原地更新），
+    其他模块持有的引用始终有效。修改 `data` 后调用 `mark_dirty()` 即可，
+    不需要加锁：事件循环单线程，修改过程中没有 await。
+    """
+    def __init__(self, path: str, flush_interval: int = STATS_FLUSH_INTERVAL_SECONDS):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.data: dict = _default_stats()
+        self.request_rate = RequestRateCounter()
+        self._dirty = False
+        self._flush_lock = asyncio.Lock()  # 串行化写盘，避免临时文件互相覆盖
+
+    async def load(self):
+        """从文件加载统计数据（原地更新 data）"""
+        try:
+            if os.path.exists(self.path):
+                async with aiofiles.open(self.path, 'r', encoding='utf-8') as f:
+                    content = await f.read()
+                loaded = json.loads(content)
+                rate_data = loaded.pop("request_rate", None)
+                # 兼容旧格式：把时间戳列表回放进分桶计数器
+                legacy_timestamps = loaded.pop("request_timestamps", None) or []
+                self.request_rate = RequestRateCounter.from_dict(rate_data)
+                for ts in legacy_timestamps:
+                    self.request_rate.record(ts)
+                self.data.clear()
+                self.data.update(_default_stats())
+                self.data.update(loaded)
+        except Exception as e:
+            logger.warning(f"[STATS] 加载统计数据失败，使用默认值: {str(e)[:50]}")
+        self._dirty = False
+        return self.data
+
+    def mark_dirty(self):
+        """标记数据已修改，等待下一次后台写盘"""
+        self._dirty = True
+
+    def record_request(self):
+        """记录一次聊天请求（总数 + 速率计数）"""
+        self.data["total_requests"] += 1
+        self.request_rate.record()
+        self._dirty = True
+
+    async def flush(self, force: bool = False):
+        """写盘（临时文件 + 原子重命名，避免写到一半的文件被读到）"""
+        if not self._dirty and not force:
+            return
+        async with self._flush_lock:
+            # 先清除脏标记再序列化：序列化期间没有 await，得到的是一致快照
+            self._dirty = False
+            content = json.dumps(
+                {**self.data, "request_rate": self.request_rate.to_dict()},
+                ensure_ascii=False
+            )
+            tmp_path = f"{self.path}.tmp"
+            try:
+                async with aiofiles.open(tmp_path, 'w', encoding='utf-8') as f:
+                    await f.write(content)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                self._dirty = True  # 下次重试
+                logger.error(f"[STATS] 保存统计数据失败: {str(e)[:50]}")
+
+    async def start_background_flush(self):
+        """启动后台持久化任务"""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+        except asyncio.CancelledError:
+            logger.info("[STATS] 后台持久化任务已停止")
+        except Exception as e:
+            logger.error(f"[STATS] 后台持久化任务异常: {e}")
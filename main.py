@@ -1,4 +1,5 @@
-import json, time, os, asyncio, uuid, ssl, re, yaml, shutil
+import json, time, os, asyncio, uuid, ssl, yaml, shutil
+from json.encoder import encode_basestring_ascii
 from datetime import datetime, timezone, timedelta
 from typing import List, Optional, Union, Dict, Any
 from pathlib import Path
@@ -6,14 +7,11 @@ import logging
 from dotenv import load_dotenv
 
 import httpx
-import aiofiles
 from fastapi import FastAPI, HTTPException, Header, Request, Body, Form
 from fastapi.responses import StreamingResponse, HTMLResponse, JSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from util.streaming_parser import parse_json_array_stream_async
-from collections import deque
-from threading import Lock
+from util.streaming_parser import parse_json_array_events_async, STREAM_EVENT_CONTENT
 
 # ---------- 数据目录配置 ----------
 # 自动检测环境：HF Spaces Pro 使用 /data，本地使用 ./data
@@ -31,6 +29,7 @@ os.makedirs(DATA_DIR, exist_ok=True)
 ACCOUNTS_FILE = os.path.join(DATA_DIR, "accounts.json")
 SETTINGS_FILE = os.path.join(DATA_DIR, "settings.yaml")
 STATS_FILE = os.path.join(DATA_DIR, "stats.json")
+SESSION_STORE_FILE = os.path.join(DATA_DIR, "sessions.db")
 IMAGE_DIR = os.path.join(DATA_DIR, "images")
 
 # 确保图片目录存在
@@ -47,8 +46,8 @@ from core.message import (
     build_full_context_text
 )
 from core.google_api import (
-    get_common_headers,
     create_google_session,
+    stream_request_with_jwt_retry,
     upload_context_file,
     get_session_file_metadata,
     download_image_with_jwt,
@@ -57,6 +56,7 @@ from core.google_api import (
 from core.account import (
     AccountManager,
     MultiAccountManager,
+    JWT_REFRESH_CHECK_INTERVAL_SECONDS,
     format_account_expiration,
     load_multi_account_config,
     load_accounts_from_source,
@@ -77,6 +77,12 @@ logger = logging.getLogger("gemini")
 
 # 导入 Uptime 追踪器
 from core import uptime as uptime_tracker
+from core.stats import StatsStore, STATS_FLUSH_INTERVAL_SECONDS
+from core.request_trace import RequestTraceStore, STATUS_SUCCESS, STATUS_ERROR, STATUS_TIMEOUT
+from core.log_store import LogStore
+from core.session_pool import SessionPool
+from core.session_cache import SESSION_CACHE_SWEEP_INTERVAL_SECONDS
+from core.session_store import SessionBindingStore, SESSION_STORE_FLUSH_INTERVAL_SECONDS
 
 # 导入注册和登录服务（检查环境）
 _register_service_available = os.getenv("ENABLE_REGISTER_SERVICE", "true").lower() != "false"
@@ -99,46 +105,14 @@ from util.template_helpers import prepare_admin_template_data
 
 # ---------- 日志配置 ----------
 
-# 内存日志缓冲区 (保留最近 3000 条日志，重启后清空)
-log_buffer = deque(maxlen=3000)
-log_lock = Lock()
+# 内存日志存储 (按列保存最近 N 条日志，重启后清空)
+log_store = LogStore(config.performance.log_capacity)
+# 请求生命周期追踪（用于 /public/log，由 chat 流程直接写入）
+request_traces = RequestTraceStore()
 
-# 统计数据持久化
-stats_lock = asyncio.Lock()  # 改为异步锁
-
-async def load_stats():
-    """加载统计数据（异步）"""
-    try:
-        if os.path.exists(STATS_FILE):
-            async with aiofiles.open(STATS_FILE, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                return json.loads(content)
-    except Exception:
-        pass
-    return {
-        "total_visitors": 0,
-        "total_requests": 0,
-        "request_timestamps": [],  # 最近1小时的请求时间戳
-        "visitor_ips": {},  # {ip: timestamp} 记录访问IP和时间
-        "account_conversations": {}  # {account_id: conversation_count} 账户对话次数
-    }
-
-async def save_stats(stats):
-    """保存统计数据（异步，避免阻塞事件循环）"""
-    try:
-        async with aiofiles.open(STATS_FILE, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(stats, ensure_ascii=False, indent=2))
-    except Exception as e:
-        logger.error(f"[STATS] 保存统计数据失败: {str(e)[:50]}")
-
-# 初始化统计数据（需要在启动时异步加载）
-global_stats = {
-    "total_visitors": 0,
-    "total_requests": 0,
-    "request_timestamps": [],
-    "visitor_ips": {},
-    "account_conversations": {}
-}
+# 统计数据（内存维护，后台定期持久化）
+stats_store = StatsStore(STATS_FILE)
+global_stats = stats_store.data
 
 class MemoryLogHandler(logging.Handler):
     """自定义日志处理器，将日志写入内存缓冲区"""
@@ -147,12 +121,11 @@ class MemoryLogHandler(logging.Handler):
         # 转换为北京时间（UTC+8）
         beijing_tz = timezone(timedelta(hours=8))
         beijing_time = datetime.fromtimestamp(record.created, tz=beijing_tz)
-        with log_lock:
-            log_buffer.append({
-                "time": beijing_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "level": record.levelname,
-                "message": record.getMessage()
-            })
+        log_store.append(
+            beijing_time.strftime("%Y-%m-%d %H:%M:%S"),
+            record.levelname,
+            record.getMessage()
+        )
 
 # 添加内存日志处理器（logger 已在上面初始化）
 memory_handler = MemoryLogHandler()
@@ -186,6 +159,15 @@ ACCOUNT_FAILURE_THRESHOLD = config.retry.account_failure_threshold
 RATE_LIMIT_COOLDOWN_SECONDS = config.retry.rate_limit_cooldown_seconds
 SESSION_CACHE_TTL_SECONDS = config.retry.session_cache_ttl_seconds
 
+# ---------- 性能优化配置 ----------
+STREAM_LOW_LATENCY = config.performance.stream_low_latency
+SCHEDULER_POLICY = config.performance.scheduler_policy
+ACCOUNT_RATE_LIMIT_PER_MINUTE = config.performance.account_rate_limit_per_minute
+SESSION_POOL_SIZE = config.performance.session_pool_size
+SESSION_CACHE_MAX_SIZE = config.performance.session_cache_max_size
+SESSION_STORE_ENABLED = config.performance.session_store_enabled
+SESSION_HEDGE_DELAY_SECONDS = config.performance.session_hedge_delay_seconds
+
 # ---------- 模型映射配置 ----------
 MODEL_MAPPING = {
     "gemini-auto": None,
@@ -238,6 +220,145 @@ multi_account_mgr = load_multi_account_config(
     SESSION_CACHE_TTL_SECONDS,
     global_stats
 )
+multi_account_mgr.set_scheduler(SCHEDULER_POLICY)
+multi_account_mgr.set_rate_limit(ACCOUNT_RATE_LIMIT_PER_MINUTE)
+multi_account_mgr.set_session_cache_size(SESSION_CACHE_MAX_SIZE)
+
+# 会话绑定持久化存储（启用时在启动阶段挂接到会话缓存）
+session_store: Optional[SessionBindingStore] = None
+
+async def apply_session_store_setting(enabled: bool):
+    """按配置挂接或卸下会话绑定持久化存储"""
+    global session_store
+    if enabled and session_store is None:
+        store = SessionBindingStore(SESSION_STORE_FILE)
+        try:
+            store.open()
+            loaded = multi_account_mgr.global_session_cache.attach_store(store)
+        except Exception as e:
+            store.close()
+            logger.error(f"[CACHE] 会话绑定存储打开失败: {str(e)[:50]}")
+            return
+        session_store = store
+        # 丢弃已删除或已禁用账户的绑定
+        multi_account_mgr.global_session_cache.retain_accounts(multi_account_mgr.active_account_ids())
+        logger.info(f"[CACHE] 会话绑定持久化已启用，从 {SESSION_STORE_FILE} 恢复 {loaded} 个会话")
+    elif not enabled and session_store is not None:
+        multi_account_mgr.global_session_cache.detach_store()
+        await session_store.flush(multi_account_mgr.cache_ttl)
+        session_store.close()
+        session_store = None
+        logger.info("[CACHE] 会话绑定持久化已关闭")
+
+# 预创建 Session 池（http_client 可能因代理变化重建，创建时读取当前的客户端）
+async def _create_pooled_session(account_manager: AccountManager) -> str:
+    # 后台预创建失败由 SessionPool 暂停重试，不计入账户错误计数
+    return await create_google_session(account_manager, http_client, USER_AGENT, track_errors=False)
+
+session_pool = SessionPool(_create_pooled_session, SESSION_POOL_SIZE)
+
+async def acquire_google_session(account_manager: AccountManager, request_id: str = "") -> str:
+    """为新对话获取 Session（优先使用预创建的，没有则现场创建）"""
+    session_name = session_pool.pop(account_manager)
+    if session_name:
+        logger.info(f"[SESSION] [{account_manager.config.account_id}] [req_{request_id}] 使用预创建 Session: {session_name[-12:]}")
+        return session_name
+    return await create_google_session(account_manager, http_client, USER_AGENT, request_id)
+
+def _recycle_hedged_session(account_manager: AccountManager, task: asyncio.Task):
+    """落后的对冲尝试完成后，把未使用的 Session 归还预创建池"""
+    if task.cancelled() or task.exception() is not None:
+        return
+    if session_pool.recycle(account_manager, task.result()):
+        logger.info(f"[SESSION] [{account_manager.config.account_id}] 对冲创建的 Session 已回收")
+
+async def acquire_new_conversation_session(request_id: str) -> tuple:
+    """新对话选择账户并获取 Session，返回 (account_manager, session_name)
+
+    最多尝试 MAX_NEW_SESSION_TRIES 个账户，失败时立即换下一个账户；
+    开启对冲时，进行中的尝试超过 SESSION_HEDGE_DELAY_SECONDS 仍未返回，
+    就并行在下一个账户上再发起一次，先成功者胜出；
+    落后的尝试完成后 Session 回收进 session_pool（不受预创建开关和目标深度限制），由下一个新对话取用
+    """
+    max_account_tries = min(MAX_NEW_SESSION_TRIES, len(multi_account_mgr.accounts))
+    if max_account_tries <= 0:
+        logger.error(f"[CHAT] [req_{request_id}] 没有可用账户")
+        request_traces.complete(request_id, STATUS_ERROR)
+        raise HTTPException(503, "No available accounts")
+
+    pending: Dict[asyncio.Task, tuple] = {}  # 进行中的尝试 -> (account_manager, 尝试序号)
+    tried: set = set()  # 已发起尝试的账户ID（进行中和已失败的），不再重复选择
+    launched = 0
+    last_error = None
+
+    def record_failure(account_id: str, attempt: int, e: Exception):
+        nonlocal last_error
+        last_error = e
+        logger.error(f"[CHAT] [req_{request_id}] 账户 {account_id} 创建会话失败 (尝试 {attempt}/{max_account_tries}) - {type(e).__name__}: {str(e)}")
+        # 记录账号池状态（单个账户失败）
+        uptime_tracker.record_request("account_pool", False)
+
+    async def launch():
+        nonlocal launched
+        launched += 1
+        try:
+            account_manager = await multi_account_mgr.get_account(None, request_id, exclude=tried)
+        except Exception as e:
+            # 没有尚未尝试过的可用账户：不再发起新的尝试，保留之前账户的失败原因
+            attempt, launched = launched, max_account_tries
+            if last_error is None:
+                record_failure("unknown", attempt, e)
+            return
+        tried.add(account_manager.config.account_id)
+        request_traces.account_selected(request_id)
+        task = asyncio.create_task(acquire_google_session(account_manager, request_id))
+        pending[task] = (account_manager, launched)
+
+    try:
+        await launch()
+        while pending or launched < max_account_tries:
+            if not pending:
+                request_traces.retry(request_id)
+                await launch()
+                continue
+
+            hedge = SESSION_HEDGE_DELAY_SECONDS > 0 and launched < max_account_tries
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=SESSION_HEDGE_DELAY_SECONDS if hedge else None,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                logger.warning(f"[CHAT] [req_{request_id}] 创建会话超过 {SESSION_HEDGE_DELAY_SECONDS}秒 未返回，并行尝试其他账户")
+                await launch()
+                continue
+
+            winner = None
+            for task in done:
+                account_manager, attempt = pending.pop(task)
+                try:
+                    google_session = task.result()
+                except Exception as e:
+                    record_failure(account_manager.config.account_id, attempt, e)
+                    continue
+                if winner is None:
+                    winner = (account_manager, google_session)
+                else:
+                    _recycle_hedged_session(account_manager, task)
+            if winner:
+                return winner
+            if launched < max_account_tries:
+                # 继续尝试下一个账户
+                request_traces.retry(request_id)
+                await launch()
+    finally:
+        # 未完成的尝试不取消（请求已发出），完成后回收 Session
+        for task, (account_manager, _) in pending.items():
+            task.add_done_callback(lambda t, acc=account_manager: _recycle_hedged_session(acc, t))
+
+    logger.error(f"[CHAT] [req_{request_id}] 所有账户均不可用")
+    request_traces.complete(request_id, STATUS_ERROR)
+    raise HTTPException(503, f"All accounts unavailable: {str(last_error)[:100]}")
 
 # 验证必需的环境变量
 if not ADMIN_KEY:
@@ -340,11 +461,54 @@ else:
     logger.info(f"[SYSTEM] 图片静态服务已启用: /images/ -> {IMAGE_DIR} (本地持久化)")
 
 # ---------- 后台任务启动 ----------
+async def jwt_refresh_task():
+    """后台提前刷新即将过期的 JWT（每次读取当前的账户管理器，重载账户后依然有效）"""
+    try:
+        while True:
+            await asyncio.sleep(JWT_REFRESH_CHECK_INTERVAL_SECONDS)
+            await multi_account_mgr.refresh_expiring_jwts()
+    except asyncio.CancelledError:
+        logger.info("[AUTH] 后台 JWT 刷新任务已停止")
+    except Exception as e:
+        logger.error(f"[AUTH] 后台 JWT 刷新任务异常: {e}")
+
+async def session_cache_cleanup_task():
+    """后台清理过期的会话缓存（每次读取当前的账户管理器，重载账户后依然有效）"""
+    try:
+        while True:
+            await asyncio.sleep(SESSION_CACHE_SWEEP_INTERVAL_SECONDS)
+            await multi_account_mgr.sweep_session_cache()
+    except asyncio.CancelledError:
+        logger.info("[CACHE] 后台清理任务已停止")
+    except Exception as e:
+        logger.error(f"[CACHE] 后台清理任务异常: {e}")
+
+async def session_store_flush_task():
+    """后台批量写入会话绑定（未启用持久化时空转）"""
+    try:
+        while True:
+            await asyncio.sleep(SESSION_STORE_FLUSH_INTERVAL_SECONDS)
+            if session_store is not None:
+                await session_store.flush(multi_account_mgr.cache_ttl)
+    except asyncio.CancelledError:
+        logger.info("[CACHE] 会话绑定写入任务已停止")
+    except Exception as e:
+        logger.error(f"[CACHE] 会话绑定写入任务异常: {e}")
+
+async def session_pool_task():
+    """后台补充预创建 Session（每次读取当前的账户管理器，重载账户后依然有效）"""
+    try:
+        while True:
+            await session_pool.wait_for_demand()
+            await session_pool.top_up(multi_account_mgr)
+    except asyncio.CancelledError:
+        logger.info("[SESSION] 后台 Session 预创建任务已停止")
+    except Exception as e:
+        logger.error(f"[SESSION] 后台 Session 预创建任务异常: {e}")
+
 @app.on_event("startup")
 async def startup_event():
     """应用启动时初始化后台任务"""
-    global global_stats
-
     # 文件迁移逻辑：将根目录的旧文件迁移到 data 目录
     old_accounts = "accounts.json"
     if os.path.exists(old_accounts) and not os.path.exists(ACCOUNTS_FILE):
@@ -354,13 +518,29 @@ async def startup_event():
         except Exception as e:
             logger.warning(f"{logger_prefix} 文件迁移失败: {e}")
 
-    # 加载统计数据
-    global_stats = await load_stats()
+    # 加载统计数据（原地更新 global_stats）
+    await stats_store.load()
     logger.info(f"[SYSTEM] 统计数据已加载: {global_stats['total_requests']} 次请求, {global_stats['total_visitors']} 位访客")
 
+    # 启动统计数据持久化任务
+    asyncio.create_task(stats_store.start_background_flush())
+    logger.info(f"[SYSTEM] 统计数据持久化任务已启动（间隔: {STATS_FLUSH_INTERVAL_SECONDS}秒）")
+
+    # 恢复持久化的会话绑定，启动写入任务
+    await apply_session_store_setting(SESSION_STORE_ENABLED)
+    asyncio.create_task(session_store_flush_task())
+
     # 启动缓存清理任务
-    asyncio.create_task(multi_account_mgr.start_background_cleanup())
-    logger.info("[SYSTEM] 后台缓存清理任务已启动（间隔: 5分钟）")
+    asyncio.create_task(session_cache_cleanup_task())
+    logger.info(f"[SYSTEM] 后台缓存清理任务已启动（间隔: {SESSION_CACHE_SWEEP_INTERVAL_SECONDS}秒）")
+
+    # 启动 JWT 后台刷新任务
+    asyncio.create_task(jwt_refresh_task())
+    logger.info(f"[SYSTEM] JWT 后台刷新任务已启动（间隔: {JWT_REFRESH_CHECK_INTERVAL_SECONDS}秒）")
+
+    # 启动 Session 预创建任务
+    asyncio.create_task(session_pool_task())
+    logger.info(f"[SYSTEM] Session 预创建任务已启动（每账户: {SESSION_POOL_SIZE}个）")
 
     # 启动 Uptime 数据聚合任务
     asyncio.create_task(uptime_tracker.uptime_aggregation_task())
@@ -380,210 +560,20 @@ async def startup_event():
     else:
         logger.info("[SYSTEM] 登录服务未启用，跳过轮询任务")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时持久化统计数据"""
+    await stats_store.flush()
+    logger.info("[SYSTEM] 统计数据已保存")
+    if session_store is not None:
+        await session_store.flush(multi_account_mgr.cache_ttl)
+        session_store.close()
+        logger.info("[SYSTEM] 会话绑定已保存")
+
 # ---------- 日志脱敏函数 ----------
 def get_sanitized_logs(limit: int = 100) -> list:
-    """获取脱敏后的日志列表，按请求ID分组并提取关键事件"""
-    with log_lock:
-        logs = list(log_buffer)
-
-    # 按请求ID分组（支持两种格式：带[req_xxx]和不带的）
-    request_logs = {}
-    orphan_logs = []  # 没有request_id的日志（如选择账户）
-
-    for log in logs:
-        message = log["message"]
-        req_match = re.search(r'\[req_([a-z0-9]+)\]', message)
-
-        if req_match:
-            request_id = req_match.group(1)
-            if request_id not in request_logs:
-                request_logs[request_id] = []
-            request_logs[request_id].append(log)
-        else:
-            # 没有request_id的日志（如选择账户），暂存
-            orphan_logs.append(log)
-
-    # 将orphan_logs（如选择账户）关联到对应的请求
-    # 策略：将orphan日志关联到时间上最接近的后续请求
-    for orphan in orphan_logs:
-        orphan_time = orphan["time"]
-        # 找到时间上最接近且在orphan之后的请求
-        closest_request_id = None
-        min_time_diff = None
-
-        for request_id, req_logs in request_logs.items():
-            if req_logs:
-                first_log_time = req_logs[0]["time"]
-                # orphan应该在请求之前或同时
-                if first_log_time >= orphan_time:
-                    if min_time_diff is None or first_log_time < min_time_diff:
-                        min_time_diff = first_log_time
-                        closest_request_id = request_id
-
-        # 如果找到最接近的请求，将orphan日志插入到该请求的日志列表开头
-        if closest_request_id:
-            request_logs[closest_request_id].insert(0, orphan)
-
-    # 为每个请求提取关键事件
-    sanitized = []
-    for request_id, req_logs in request_logs.items():
-        # 收集关键信息
-        model = None
-        message_count = None
-        retry_events = []
-        final_status = "in_progress"
-        duration = None
-        start_time = req_logs[0]["time"]
-
-        # 遍历该请求的所有日志
-        for log in req_logs:
-            message = log["message"]
-
-            # 提取模型名称和消息数量（开始对话）
-            if '收到请求:' in message and not model:
-                model_match = re.search(r'收到请求: ([^ |]+)', message)
-                if model_match:
-                    model = model_match.group(1)
-                count_match = re.search(r'(\d+)条消息', message)
-                if count_match:
-                    message_count = int(count_match.group(1))
-
-            # 提取重试事件（包括失败尝试、账户切换、选择账户）
-            # 注意：不提取"正在重试"日志，因为它和"失败 (尝试"是配套的
-            if any(keyword in message for keyword in ['切换账户', '选择账户', '失败 (尝试']):
-                retry_events.append({
-                    "time": log["time"],
-                    "message": message
-                })
-
-            # 提取响应完成（最高优先级 - 最终成功则忽略中间错误）
-            if '响应完成:' in message:
-                time_match = re.search(r'响应完成: ([\d.]+)秒', message)
-                if time_match:
-                    duration = time_match.group(1) + 's'
-                    final_status = "success"
-
-            # 检测非流式响应完成
-            if '非流式响应完成' in message:
-                final_status = "success"
-
-            # 检测失败状态（仅在非success状态下）
-            if final_status != "success" and (log['level'] == 'ERROR' or '失败' in message):
-                final_status = "error"
-
-            # 检测超时（仅在非success状态下）
-            if final_status != "success" and '超时' in message:
-                final_status = "timeout"
-
-        # 如果没有模型信息但有错误，仍然显示
-        if not model and final_status == "in_progress":
-            continue
-
-        # 构建关键事件列表
-        events = []
-
-        # 1. 开始对话
-        if model:
-            events.append({
-                "time": start_time,
-                "type": "start",
-                "content": f"{model} | {message_count}条消息" if message_count else model
-            })
-        else:
-            # 没有模型信息但有错误的情况
-            events.append({
-                "time": start_time,
-                "type": "start",
-                "content": "请求处理中"
-            })
-
-        # 2. 重试事件
-        failure_count = 0  # 失败重试计数
-        account_select_count = 0  # 账户选择计数
-
-        for i, retry in enumerate(retry_events):
-            msg = retry["message"]
-
-            # 识别不同类型的重试事件（按优先级匹配）
-            if '失败 (尝试' in msg:
-                # 创建会话失败
-                failure_count += 1
-                events.append({
-                    "time": retry["time"],
-                    "type": "retry",
-                    "content": f"服务异常，正在重试（{failure_count}）"
-                })
-            elif '选择账户' in msg:
-                # 账户选择/切换
-                account_select_count += 1
-
-                # 检查下一条日志是否是"切换账户"，如果是则跳过当前"选择账户"（避免重复）
-                next_is_switch = (i + 1 < len(retry_events) and '切换账户' in retry_events[i + 1]["message"])
-
-                if not next_is_switch:
-                    if account_select_count == 1:
-                        # 第一次选择：显示为"选择服务节点"
-                        events.append({
-                            "time": retry["time"],
-                            "type": "select",
-                            "content": "选择服务节点"
-                        })
-                    else:
-                        # 第二次及以后：显示为"切换服务节点"
-                        events.append({
-                            "time": retry["time"],
-                            "type": "switch",
-                            "content": "切换服务节点"
-                        })
-            elif '切换账户' in msg:
-                # 运行时切换账户（显示为"切换服务节点"）
-                events.append({
-                    "time": retry["time"],
-                    "type": "switch",
-                    "content": "切换服务节点"
-                })
-
-        # 3. 完成事件
-        if final_status == "success":
-            if duration:
-                events.append({
-                    "time": req_logs[-1]["time"],
-                    "type": "complete",
-                    "status": "success",
-                    "content": f"响应完成 | 耗时{duration}"
-                })
-            else:
-                events.append({
-                    "time": req_logs[-1]["time"],
-                    "type": "complete",
-                    "status": "success",
-                    "content": "响应完成"
-                })
-        elif final_status == "error":
-            events.append({
-                "time": req_logs[-1]["time"],
-                "type": "complete",
-                "status": "error",
-                "content": "请求失败"
-            })
-        elif final_status == "timeout":
-            events.append({
-                "time": req_logs[-1]["time"],
-                "type": "complete",
-                "status": "timeout",
-                "content": "请求超时"
-            })
-
-        sanitized.append({
-            "request_id": request_id,
-            "start_time": start_time,
-            "status": final_status,
-            "events": events
-        })
-
-    # 按时间排序并限制数量
-    sanitized.sort(key=lambda x: x["start_time"], reverse=True)
-    return sanitized[:limit]
+    """获取脱敏后的日志列表（直接读取请求追踪记录）"""
+    return request_traces.recent(limit)
 
 class Message(BaseModel):
     role: str
@@ -596,28 +586,96 @@ class ChatRequest(BaseModel):
     temperature: Optional[float] = 0.7
     top_p: Optional[float] = 1.0
 
-def create_chunk(id: str, created: int, model: str, delta: dict, finish_reason: Union[str, None]) -> str:
-    chunk = {
-        "id": id,
-        "object": "chat.completion.chunk",
-        "created": created,
-        "model": model,
-        "choices": [{
-            "index": 0,
-            "delta": delta,
-            "logprobs": None,  # OpenAI 标准字段
-            "finish_reason": finish_reason
-        }],
-        "system_fingerprint": None  # OpenAI 标准字段（可选）
-    }
-    return json.dumps(chunk)
+class ChunkEncoder:
+    """单次响应的 SSE 数据块编码器
+
+    同一响应内 id / created / model 以及外层结构都不变，初始化时一次性序列化好
+    前缀和后缀，之后每个 token 只需转义 delta 文本再拼接，避免每块都构造字典并 json.dumps。
+    输出与 json.dumps(完整 chunk 字典) 逐字节一致。
+    """
+    _DELTA_PLACEHOLDER = "__DELTA__"
+
+    def __init__(self, id: str, created: int, model: str):
+        self.id = id
+        self.created = created
+        self.model = model
+        self._prefix, self._suffix = self._template(None)
+        self._role_event = self._event('{"role": "assistant"}')
+
+    def _template(self, finish_reason: Union[str, None]) -> tuple:
+        chunk = {
+            "id": self.id,
+            "object": "chat.completion.chunk",
+            "created": self.created,
+            "model": self.model,
+            "choices": [{
+                "index": 0,
+                "delta": self._DELTA_PLACEHOLDER,
+                "logprobs": None,  # OpenAI 标准字段
+                "finish_reason": finish_reason
+            }],
+            "system_fingerprint": None  # OpenAI 标准字段（可选）
+        }
+        prefix, suffix = json.dumps(chunk).split(json.dumps(self._DELTA_PLACEHOLDER))
+        return "data: " + prefix, suffix + "\n\n"
+
+    def _event(self, delta_json: str) -> str:
+        return f"{self._prefix}{delta_json}{self._suffix}"
+
+    def role(self) -> str:
+        """首个数据块（声明 assistant 角色）"""
+        return self._role_event
+
+    def content(self, text: str) -> str:
+        """正常内容数据块"""
+        return f'{self._prefix}{{"content": {encode_basestring_ascii(text)}}}{self._suffix}'
+
+    def reasoning(self, text: str) -> str:
+        """思考过程数据块（reasoning_content 字段，类似 OpenAI o1）"""
+        return f'{self._prefix}{{"reasoning_content": {encode_basestring_ascii(text)}}}{self._suffix}'
+
+    def finish(self, finish_reason: str = "stop") -> str:
+        """结束数据块（空 delta + finish_reason）"""
+        prefix, suffix = self._template(finish_reason)
+        return f"{prefix}{{}}{suffix}"
+
+class ResponseCollector:
+    """非流式响应聚合器
+
+    与 ChunkEncoder 接口一致，stream_chat_generator 直接把 delta 写进来，
+    不再经过 SSE 字符串格式化再 json.loads 解析的往返；
+    各片段先存入列表，结束时统一 join，避免长回答上的二次方字符串拼接。
+    """
+    def __init__(self):
+        self.content_parts: List[str] = []
+        self.reasoning_parts: List[str] = []
+
+    def role(self) -> None:
+        return None
+
+    def content(self, text: str) -> None:
+        self.content_parts.append(text)
+
+    def reasoning(self, text: str) -> None:
+        self.reasoning_parts.append(text)
+
+    def finish(self, finish_reason: str = "stop") -> None:
+        return None
+
+    @property
+    def full_content(self) -> str:
+        return "".join(self.content_parts)
+
+    @property
+    def full_reasoning(self) -> str:
+        return "".join(self.reasoning_parts)
 
 # ---------- 辅助函数 ----------
 
 def get_admin_template_data(request: Request):
     """获取管理页面模板数据（避免重复代码）"""
     return prepare_admin_template_data(
-        request, multi_account_mgr, log_buffer, log_lock,
+        request, multi_account_mgr, log_store,
         api_key=API_KEY, base_url=BASE_URL, proxy=PROXY,
         logo_url=LOGO_URL, chat_url=CHAT_URL, path_prefix=PATH_PREFIX,
         max_new_session_tries=MAX_NEW_SESSION_TRIES,
@@ -823,6 +881,7 @@ async def admin_enable_account(request: Request, account_id: str):
         # 重置运行时错误状态（允许手动恢复错误禁用的账户）
         if account_id in multi_account_mgr.accounts:
             account_mgr = multi_account_mgr.accounts[account_id]
+            account_mgr.circuit.reset()
             account_mgr.is_available = True
             account_mgr.error_count = 0
             account_mgr.last_429_time = 0.0
@@ -875,6 +934,16 @@ async def admin_get_settings(request: Request):
         "auto_register": {
             "enabled": config.auto_register.enabled,
             "cron": config.auto_register.cron
+        },
+        "performance": {
+            "stream_low_latency": config.performance.stream_low_latency,
+            "log_capacity": config.performance.log_capacity,
+            "scheduler_policy": config.performance.scheduler_policy,
+            "account_rate_limit_per_minute": config.performance.account_rate_limit_per_minute,
+            "session_cache_max_size": config.performance.session_cache_max_size,
+            "session_store_enabled": config.performance.session_store_enabled,
+            "session_pool_size": config.performance.session_pool_size,
+            "session_hedge_delay_seconds": config.performance.session_hedge_delay_seconds
         }
     }
 
@@ -886,7 +955,8 @@ async def admin_update_settings(request: Request, new_settings: dict = Body(...)
     global IMAGE_GENERATION_ENABLED, IMAGE_GENERATION_MODELS
     global MAX_NEW_SESSION_TRIES, MAX_REQUEST_RETRIES, MAX_ACCOUNT_SWITCH_TRIES
     global ACCOUNT_FAILURE_THRESHOLD, RATE_LIMIT_COOLDOWN_SECONDS, SESSION_CACHE_TTL_SECONDS
-    global SESSION_EXPIRE_HOURS, multi_account_mgr, http_client
+    global SESSION_EXPIRE_HOURS, STREAM_LOW_LATENCY, SCHEDULER_POLICY, ACCOUNT_RATE_LIMIT_PER_MINUTE
+    global SESSION_POOL_SIZE, SESSION_CACHE_MAX_SIZE, SESSION_STORE_ENABLED, SESSION_HEDGE_DELAY_SECONDS, multi_account_mgr, http_client
 
     try:
         # 保存旧配置用于对比
@@ -918,6 +988,19 @@ async def admin_update_settings(request: Request, new_settings: dict = Body(...)
         RATE_LIMIT_COOLDOWN_SECONDS = config.retry.rate_limit_cooldown_seconds
         SESSION_CACHE_TTL_SECONDS = config.retry.session_cache_ttl_seconds
         SESSION_EXPIRE_HOURS = config.session.expire_hours
+        STREAM_LOW_LATENCY = config.performance.stream_low_latency
+        SCHEDULER_POLICY = config.performance.scheduler_policy
+        ACCOUNT_RATE_LIMIT_PER_MINUTE = config.performance.account_rate_limit_per_minute
+        SESSION_POOL_SIZE = config.performance.session_pool_size
+        SESSION_CACHE_MAX_SIZE = config.performance.session_cache_max_size
+        SESSION_STORE_ENABLED = config.performance.session_store_enabled
+        SESSION_HEDGE_DELAY_SECONDS = config.performance.session_hedge_delay_seconds
+        log_store.resize(config.performance.log_capacity)
+        multi_account_mgr.set_scheduler(SCHEDULER_POLICY)
+        multi_account_mgr.set_rate_limit(ACCOUNT_RATE_LIMIT_PER_MINUTE)
+        multi_account_mgr.set_session_cache_size(SESSION_CACHE_MAX_SIZE)
+        await apply_session_store_setting(SESSION_STORE_ENABLED)
+        session_pool.set_target_size(SESSION_POOL_SIZE)
 
         # 检查是否需要重建 HTTP 客户端（代理变化）
         if old_proxy != PROXY:
@@ -950,6 +1033,8 @@ async def admin_update_settings(request: Request, new_settings: dict = Body(...)
             for account_id, account_mgr in multi_account_mgr.accounts.items():
                 account_mgr.account_failure_threshold = ACCOUNT_FAILURE_THRESHOLD
                 account_mgr.rate_limit_cooldown_seconds = RATE_LIMIT_COOLDOWN_SECONDS
+            # 冷却时间变化后重新安排冷却定时器
+            multi_account_mgr.refresh_all_accounts()
 
         logger.info(f"[CONFIG] 系统设置已更新并实时生效")
         return {"status": "success", "message": "设置已保存并实时生效！"}
@@ -1104,44 +1189,35 @@ async def admin_get_logs(
     level: str = None,
     search: str = None,
     start_time: str = None,
-    end_time: str = None
+    end_time: str = None,
+    before: int = None,
+    after: int = None
 ):
-    with log_lock:
-        logs = list(log_buffer)
-
-    stats_by_level = {}
-    error_logs = []
-    chat_count = 0
-    for log in logs:
-        level_name = log.get("level", "INFO")
-        stats_by_level[level_name] = stats_by_level.get(level_name, 0) + 1
-        if level_name in ["ERROR", "CRITICAL"]:
-            error_logs.append(log)
-        if "收到请求" in log.get("message", ""):
-            chat_count += 1
-
+    """查询内存日志（before/after 为日志 id 游标，用于翻页和增量刷新）"""
     if level:
         level = level.upper()
-        logs = [log for log in logs if log["level"] == level]
-    if search:
-        logs = [log for log in logs if search.lower() in log["message"].lower()]
-    if start_time:
-        logs = [log for log in logs if log["time"] >= start_time]
-    if end_time:
-        logs = [log for log in logs if log["time"] <= end_time]
-
-    limit = min(limit, 3000)
-    filtered_logs = logs[-limit:]
+    limit = max(1, min(limit, log_store.capacity))
+    result = log_store.query(
+        limit=limit, level=level, search=search,
+        start_time=start_time, end_time=end_time,
+        before=before, after=after
+    )
+    logs = result["logs"]
+    stats = log_store.stats()
 
     return {
-        "total": len(filtered_logs),
+        "total": len(logs),
         "limit": limit,
         "filters": {"level": level, "search": search, "start_time": start_time, "end_time": end_time},
-        "logs": filtered_logs,
+        "logs": logs,
+        "has_more": result["has_more"],
+        # 翻页游标：更旧一页传 before，增量刷新传 after
+        "prev_cursor": logs[0]["id"] if logs else before,
+        "next_cursor": logs[-1]["id"] if logs else after,
         "stats": {
-            "memory": {"total": len(log_buffer), "by_level": stats_by_level, "capacity": log_buffer.maxlen},
-            "errors": {"count": len(error_logs), "recent": error_logs[-10:]},
-            "chat_count": chat_count
+            "memory": {"total": stats["total"], "by_level": stats["by_level"], "capacity": stats["capacity"]},
+            "errors": {"count": stats["error_count"], "recent": stats["recent_errors"]},
+            "chat_count": request_traces.started_count
         }
     }
 
@@ -1150,9 +1226,8 @@ async def admin_get_logs(
 async def admin_clear_logs(request: Request, confirm: str = None):
     if confirm != "yes":
         raise HTTPException(400, "需要 confirm=yes 参数确认清空操作")
-    with log_lock:
-        cleared_count = len(log_buffer)
-        log_buffer.clear()
+    cleared_count = log_store.clear()
+    request_traces.clear()
     logger.info("[LOG] 日志已清空")
     return {"status": "success", "message": "已清空内存日志", "cleared_count": cleared_count}
 
@@ -1207,9 +1282,11 @@ if PATH_PREFIX:
         level: str = None,
         search: str = None,
         start_time: str = None,
-        end_time: str = None
+        end_time: str = None,
+        before: int = None,
+        after: int = None
     ):
-        return await admin_get_logs(request=request, limit=limit, level=level, search=search, start_time=start_time, end_time=end_time)
+        return await admin_get_logs(request=request, limit=limit, level=level, search=search, start_time=start_time, end_time=end_time, before=before, after=after)
 
     @app.delete(f"/{PATH_PREFIX}/log")
     @require_login()
@@ -1342,109 +1419,97 @@ async def chat_impl(
     else:
         client_ip = request.client.host if request.client else "unknown"
 
-    # 记录请求统计
-    async with stats_lock:
-        global_stats["total_requests"] += 1
-        global_stats["request_timestamps"].append(time.time())
-        await save_stats(global_stats)
-
-    # 2. 模型校验
-    if req.model not in MODEL_MAPPING:
-        logger.error(f"[CHAT] [req_{request_id}] 不支持的模型: {req.model}")
-        raise HTTPException(
-            status_code=404,
-            detail=f"Model '{req.model}' not found. Available models: {list(MODEL_MAPPING.keys())}"
-        )
+    # 记录请求统计（仅内存，后台定期写盘）
+    stats_store.record_request()
+    request_traces.start(request_id, req.model, len(req.messages))
 
-    # 保存模型信息到 request.state（用于 Uptime 追踪）
-    request.state.model = req.model
+    try:
+        # 2. 模型校验
+        if req.model not in MODEL_MAPPING:
+            logger.error(f"[CHAT] [req_{request_id}] 不支持的模型: {req.model}")
+            request_traces.complete(request_id, STATUS_ERROR)
+            raise HTTPException(
+                status_code=404,
+                detail=f"Model '{req.model}' not found. Available models: {list(MODEL_MAPPING.keys())}"
+            )
 
-    # 3. 生成会话指纹，获取Session锁（防止同一对话的并发请求冲突）
-    conv_key = get_conversation_key([m.model_dump() for m in req.messages], client_ip)
-    session_lock = await multi_account_mgr.acquire_session_lock(conv_key)
+        # 保存模型信息到 request.state（用于 Uptime 追踪）
+        request.state.model = req.model
 
-    # 4. 在锁的保护下检查缓存和处理Session（保证同一对话的请求串行化）
-    async with session_lock:
-        cached_session = multi_account_mgr.global_session_cache.get(conv_key)
+        # 3. 生成会话指纹，获取Session锁（防止同一对话的并发请求冲突）
+        conv_key = get_conversation_key(req.messages, client_ip)
 
-        if cached_session:
-            # 使用已绑定的账户
-            account_id = cached_session["account_id"]
-            account_manager = await multi_account_mgr.get_account(account_id, request_id)
-            google_session = cached_session["session_id"]
-            is_new_conversation = False
-            logger.info(f"[CHAT] [{account_id}] [req_{request_id}] 继续会话: {google_session[-12:]}")
-        else:
-            # 新对话：轮询选择可用账户，失败时尝试其他账户
-            max_account_tries = min(MAX_NEW_SESSION_TRIES, len(multi_account_mgr.accounts))
-            last_error = None
+        # 4. 在锁的保护下检查缓存和处理Session（保证同一对话的请求串行化）
+        async with multi_account_mgr.session_lock(conv_key):
+            cached_session = multi_account_mgr.global_session_cache.get(conv_key)
 
-            for attempt in range(max_account_tries):
-                try:
-                    account_manager = await multi_account_mgr.get_account(None, request_id)
-                    google_session = await create_google_session(account_manager, http_client, USER_AGENT, request_id)
-                    # 线程安全地绑定账户到此对话
-                    await multi_account_mgr.set_session_cache(
-                        conv_key,
-                        account_manager.config.account_id,
-                        google_session
-                    )
-                    is_new_conversation = True
-                    logger.info(f"[CHAT] [{account_manager.config.account_id}] [req_{request_id}] 新会话创建并绑定账户")
-                    # 记录账号池状态（账户可用）
-                    uptime_tracker.record_request("account_pool", True)
-                    break
-                except Exception as e:
-                    last_error = e
-                    error_type = type(e).__name__
-                    # 安全获取账户ID
-                    account_id = account_manager.config.account_id if 'account_manager' in locals() and account_manager else 'unknown'
-                    logger.error(f"[CHAT] [req_{request_id}] 账户 {account_id} 创建会话失败 (尝试 {attempt + 1}/{max_account_tries}) - {error_type}: {str(e)}")
-                    # 记录账号池状态（单个账户失败）
-                    uptime_tracker.record_request("account_pool", False)
-                    if attempt == max_account_tries - 1:
-                        logger.error(f"[CHAT] [req_{request_id}] 所有账户均不可用")
-                        raise HTTPException(503, f"All accounts unavailable: {str(last_error)[:100]}")
-                    # 继续尝试下一个账户
-
-    # 提取用户消息内容用于日志
-    if req.messages:
-        last_content = req.messages[-1].content
-        if isinstance(last_content, str):
-            # 显示完整消息，但限制在500字符以内
-            if len(last_content) > 500:
-                preview = last_content[:500] + "...(已截断)"
+            if cached_session:
+                # 使用已绑定的账户
+                account_id = cached_session["account_id"]
+                account_manager = await multi_account_mgr.get_account(account_id, request_id)
+                google_session = cached_session["session_id"]
+                is_new_conversation = False
+                logger.info(f"[CHAT] [{account_id}] [req_{request_id}] 继续会话: {google_session[-12:]}")
             else:
-                preview = last_content
+                # 新对话：轮询选择可用账户，失败或过慢时尝试其他账户
+                account_manager, google_session = await acquire_new_conversation_session(request_id)
+                request_traces.session_created(request_id)
+                # 线程安全地绑定账户到此对话
+                await multi_account_mgr.set_session_cache(
+                    conv_key,
+                    account_manager.config.account_id,
+                    google_session
+                )
+                is_new_conversation = True
+                logger.info(f"[CHAT] [{account_manager.config.account_id}] [req_{request_id}] 新会话创建并绑定账户")
+                # 记录账号池状态（账户可用）
+                uptime_tracker.record_request("account_pool", True)
+
+        # 提取用户消息内容用于日志
+        if req.messages:
+            last_content = req.messages[-1].content
+            if isinstance(last_content, str):
+                # 显示完整消息，但限制在500字符以内
+                if len(last_content) > 500:
+                    preview = last_content[:500] + "...(已截断)"
+                else:
+                    preview = last_content
+            else:
+                preview = f"[多模态: {len(last_content)}部分]"
         else:
-            preview = f"[多模态: {len(last_content)}部分]"
-    else:
-        preview = "[空消息]"
+            preview = "[空消息]"
 
-    # 记录请求基本信息
-    logger.info(f"[CHAT] [{account_manager.config.account_id}] [req_{request_id}] 收到请求: {req.model} | {len(req.messages)}条消息 | stream={req.stream}")
+        # 记录请求基本信息
+        logger.info(f"[CHAT] [{account_manager.config.account_id}] [req_{request_id}] 收到请求: {req.model} | {len(req.messages)}条消息 | stream={req.stream}")
 
-    # 单独记录用户消息内容（方便查看）
-    logger.info(f"[CHAT] [{account_manager.config.account_id}] [req_{request_id}] 用户消息: {preview}")
+        # 单独记录用户消息内容（方便查看）
+        logger.info(f"[CHAT] [{account_manager.config.account_id}] [req_{request_id}] 用户消息: {preview}")
 
-    # 3. 解析请求内容
-    last_text, current_images = await parse_last_message(req.messages, http_client, request_id)
+        # 3. 解析请求内容
+        last_text, current_images = await parse_last_message(req.messages, http_client, request_id)
 
-    # 4. 准备文本内容
-    if is_new_conversation:
-        # 新对话只发送最后一条
-        text_to_send = last_text
-        is_retry_mode = True
-    else:
-        # 继续对话只发送当前消息
-        text_to_send = last_text
-        is_retry_mode = False
-        # 线程安全地更新时间戳
-        await multi_account_mgr.update_session_time(conv_key)
+        # 4. 准备文本内容
+        if is_new_conversation:
+            # 新对话只发送最后一条
+            text_to_send = last_text
+            is_retry_mode = True
+        else:
+            # 继续对话只发送当前消息
+            text_to_send = last_text
+            is_retry_mode = False
+            # 线程安全地更新时间戳
+            await multi_account_mgr.update_session_time(conv_key)
+    except BaseException:
+        # 会话获取、消息解析等步骤失败时，请求不会进入 traced_response，在这里标记为失败
+        request_traces.fail_if_pending(request_id)
+        raise
 
     chat_id = f"chatcmpl-{uuid.uuid4()}"
     created_time = int(time.time())
 
+    # 非流式请求：生成器直接把 delta 写入聚合器
+    collector = None if req.stream else ResponseCollector()
+
     # 封装生成器 (含图片上传和重试逻辑)
     async def response_wrapper():
         nonlocal account_manager  # 允许修改外层的 account_manager
@@ -1468,7 +1533,8 @@ async def chat_impl(
                 cached = multi_account_mgr.global_session_cache.get(conv_key)
                 if not cached:
                     logger.warning(f"[CHAT] [{account_manager.config.account_id}] [req_{request_id}] 缓存已清理，重建Session")
-                    new_sess = await create_google_session(account_manager, http_client, USER_AGENT, request_id)
+                    new_sess = await acquire_google_session(account_manager, request_id)
+                    request_traces.session_created(request_id)
                     await multi_account_mgr.set_session_cache(
                         conv_key,
                         account_manager.config.account_id,
@@ -1491,35 +1557,41 @@ async def chat_impl(
                 if current_retry_mode:
                     current_text = build_full_context_text(req.messages)
 
-                # C. 发起对话
-                async for chunk in stream_chat_generator(
-                    current_session,
-                    current_text,
-                    current_file_ids,
-                    req.model,
-                    chat_id,
-                    created_time,
-                    account_manager,
-                    req.stream,
-                    request_id,
-                    request
-                ):
-                    yield chunk
+                # C. 发起对话（记录在途请求数，供调度策略使用）
+                active_account = account_manager
+                active_account.begin_request()
+                try:
+                    async for chunk in stream_chat_generator(
+                        current_session,
+                        current_text,
+                        current_file_ids,
+                        req.model,
+                        chat_id,
+                        created_time,
+                        account_manager,
+                        collector,
+                        request_id,
+                        request
+                    ):
+                        yield chunk
+                finally:
+                    active_account.end_request()
 
                 # 请求成功，重置账户失败计数
                 account_manager.is_available = True
                 account_manager.error_count = 0
                 account_manager.conversation_count += 1  # 增加对话次数
+                account_manager.rate_limiter.on_success()  # 限流容量缓慢回升
+                account_manager.circuit.reset()  # 熔断退避清零
 
                 # 记录账号池状态（请求成功）
                 uptime_tracker.record_request("account_pool", True)
 
                 # 保存对话次数到统计数据
-                async with stats_lock:
-                    if "account_conversations" not in global_stats:
-                        global_stats["account_conversations"] = {}
-                    global_stats["account_conversations"][account_manager.config.account_id] = account_manager.conversation_count
-                    await save_stats(global_stats)
+                if "account_conversations" not in global_stats:
+                    global_stats["account_conversations"] = {}
+                global_stats["account_conversations"][account_manager.config.account_id] = account_manager.conversation_count
+                stats_store.mark_dirty()
 
                 break
 
@@ -1536,15 +1608,17 @@ async def chat_impl(
                 # 增加账户失败计数（触发熔断机制）
                 account_manager.last_error_time = time.time()
                 if is_rate_limit:
+                    account_manager.rate_limiter.on_rate_limited()  # 限流容量减半
                     account_manager.last_429_time = time.time()
 
                 account_manager.error_count += 1
                 if account_manager.error_count >= ACCOUNT_FAILURE_THRESHOLD:
-                    account_manager.is_available = False
                     if is_rate_limit:
+                        account_manager.is_available = False
                         logger.error(f"[ACCOUNT] [{account_manager.config.account_id}] [req_{request_id}] 遇到429错误{account_manager.error_count}次，账户已禁用（需休息{RATE_LIMIT_COOLDOWN_SECONDS}秒）")
                     else:
-                        logger.error(f"[ACCOUNT] [{account_manager.config.account_id}] [req_{request_id}] 请求连续失败{account_manager.error_count}次，账户已永久禁用")
+                        backoff = account_manager.trip_circuit()
+                        logger.error(f"[ACCOUNT] [{account_manager.config.account_id}] [req_{request_id}] 请求连续失败{account_manager.error_count}次，账户已熔断（{backoff:.0f}秒后探测恢复）")
 
                 retry_count += 1
 
@@ -1564,6 +1638,7 @@ async def chat_impl(
                 # 检查是否还能继续重试
                 if retry_count <= max_retries:
                     logger.warning(f"[CHAT] [{account_manager.config.account_id}] [req_{request_id}] 正在重试 ({retry_count}/{max_retries})")
+                    request_traces.retry(request_id)
                     # 尝试切换到其他账户（客户端会传递完整上下文）
                     try:
                         # 获取新账户，跳过已失败的账户
@@ -1578,13 +1653,16 @@ async def chat_impl(
 
                         if not new_account:
                             logger.error(f"[CHAT] [req_{request_id}] 所有账户均已失败，无可用账户")
+                            request_traces.complete(request_id, STATUS_ERROR)
                             if req.stream: yield f"data: {json.dumps({'error': {'message': 'All Accounts Failed'}})}\n\n"
                             return
 
                         logger.info(f"[CHAT] [req_{request_id}] 切换账户: {account_manager.config.account_id} -> {new_account.config.account_id}")
+                        request_traces.switch(request_id)
 
                         # 创建新 Session
-                        new_sess = await create_google_session(new_account, http_client, USER_AGENT, request_id)
+                        new_sess = await acquire_google_session(new_account, request_id)
+                        request_traces.session_created(request_id)
 
                         # 更新缓存绑定到新账户
                         await multi_account_mgr.set_session_cache(
@@ -1603,6 +1681,7 @@ async def chat_impl(
                     except Exception as create_err:
                         error_type = type(create_err).__name__
                         logger.error(f"[CHAT] [req_{request_id}] 账户切换失败 ({error_type}): {str(create_err)}")
+                        request_traces.complete(request_id, STATUS_ERROR)
                         # 记录账号池状态（账户切换失败）
                         uptime_tracker.record_request("account_pool", False)
                         if req.stream: yield f"data: {json.dumps({'error': {'message': 'Account Failover Failed'}})}\n\n"
@@ -1610,28 +1689,25 @@ async def chat_impl(
                 else:
                     # 已达到最大重试次数
                     logger.error(f"[CHAT] [req_{request_id}] 已达到最大重试次数 ({max_retries})，请求失败")
+                    request_traces.complete(request_id, STATUS_TIMEOUT if isinstance(e, httpx.TimeoutException) else STATUS_ERROR)
                     if req.stream: yield f"data: {json.dumps({'error': {'message': f'Max retries ({max_retries}) exceeded: {e}'}})}\n\n"
                     return
 
+    async def traced_response():
+        try:
+            async for chunk in response_wrapper():
+                yield chunk
+        finally:
+            # 兜底：异常中断（如客户端断开）时不让请求一直显示为处理中
+            request_traces.fail_if_pending(request_id)
+
     if req.stream:
-        return StreamingResponse(response_wrapper(), media_type="text/event-stream")
+        return StreamingResponse(traced_response(), media_type="text/event-stream")
     
-    full_content = ""
-    full_reasoning = ""
-    async for chunk_str in response_wrapper():
-        if chunk_str.startswith("data: [DONE]"): break
-        if chunk_str.startswith("data: "):
-            try:
-                data = json.loads(chunk_str[6:])
-                delta = data["choices"][0]["delta"]
-                if "content" in delta:
-                    full_content += delta["content"]
-                if "reasoning_content" in delta:
-                    full_reasoning += delta["reasoning_content"]
-            except json.JSONDecodeError as e:
-                logger.error(f"[CHAT] [{account_manager.config.account_id}] [req_{request_id}] JSON解析失败: {str(e)}")
-            except (KeyError, IndexError) as e:
-                logger.error(f"[CHAT] [{account_manager.config.account_id}] [req_{request_id}] 响应格式错误 ({type(e).__name__}): {str(e)}")
+    async for _ in traced_response():
+        pass
+    full_content = collector.full_content
+    full_reasoning = collector.full_reasoning
 
     # 构建响应消息
     message = {"role": "assistant", "content": full_content}
@@ -1691,7 +1767,7 @@ def parse_images_from_response(data_list: list) -> tuple[list, str]:
     return file_ids, session_name
 
 
-async def stream_chat_generator(session: str, text_content: str, file_ids: List[str], model_name: str, chat_id: str, created_time: int, account_manager: AccountManager, is_stream: bool = True, request_id: str = "", request: Request = None):
+async def stream_chat_generator(session: str, text_content: str, file_ids: List[str], model_name: str, chat_id: str, created_time: int, account_manager: AccountManager, collector: Optional[ResponseCollector] = None, request_id: str = "", request: Request = None):
     start_time = time.time()
 
     # 记录发送给API的内容
@@ -1700,9 +1776,6 @@ async def stream_chat_generator(session: str, text_content: str, file_ids: List[
     if file_ids:
         logger.info(f"[API] [{account_manager.config.account_id}] [req_{request_id}] 附带文件: {len(file_ids)}个")
 
-    jwt = await account_manager.get_jwt(request_id)
-    headers = get_common_headers(jwt, USER_AGENT)
-
     # 构建 toolsSpec（根据配置决定是否启用图片生成）
     tools_spec = {
         "webGroundingSpec": {},
@@ -1735,46 +1808,69 @@ async def stream_chat_generator(session: str, text_content: str, file_ids: List[
             "modelId": target_model_id
         }
 
-    if is_stream:
-        chunk = create_chunk(chat_id, created_time, model_name, {"role": "assistant"}, None)
-        yield f"data: {chunk}\n\n"
+    # 流式请求编码为 SSE 数据块；非流式请求写入聚合器（不产出任何数据块）
+    emitter = collector if collector is not None else ChunkEncoder(chat_id, created_time, model_name)
+    event = emitter.role()
+    if event:
+        yield event
 
     # 使用流式请求
     json_objects = []  # 收集所有响应对象用于图片解析
     file_ids_info = None  # 保存图片信息
 
-    async with http_client.stream(
-        "POST",
+    upstream_start = time.time()
+    # 签名密钥被拒绝（401）时在同一账户上重新获取并重试一次，仍失败才按账户失败处理
+    async with stream_request_with_jwt_retry(
+        account_manager,
         "https://biz-discoveryengine.googleapis.com/v1alpha/locations/global/widgetStreamAssist",
-        headers=headers,
+        http_client,
+        USER_AGENT,
+        request_id,
         json=body,
     ) as r:
         if r.status_code != 200:
+            if r.status_code == 401:
+                account_manager.invalidate_jwt()
             error_text = await r.aread()
             raise HTTPException(status_code=r.status_code, detail=f"Upstream Error {error_text.decode()}")
+        account_manager.record_latency(time.time() - upstream_start)
 
-        # 使用异步解析器处理 JSON 数组流
+        # 使用字节级解析器处理 JSON 数组流（跳过 httpx 的逐行解码）
+        # 低延迟模式下 content 对象一闭合就产出，不等待整个响应对象
+        low_latency = STREAM_LOW_LATENCY
+        first_token_seen = False
         try:
-            async for json_obj in parse_json_array_stream_async(r.aiter_lines()):
-                json_objects.append(json_obj)  # 收集响应
+            async for event_type, payload in parse_json_array_events_async(r.aiter_bytes(), early_content=low_latency):
+                if event_type == STREAM_EVENT_CONTENT:
+                    content_objs = (payload,)
+                else:
+                    json_objects.append(payload)  # 收集响应
+                    if low_latency:
+                        continue  # 文本已通过 content 事件提前输出
+                    content_objs = [
+                        reply.get("groundedContent", {}).get("content", {})
+                        for reply in payload.get("streamAssistResponse", {}).get("answer", {}).get("replies", [])
+                    ]
 
                 # 提取文本内容
-                for reply in json_obj.get("streamAssistResponse", {}).get("answer", {}).get("replies", []):
-                    content_obj = reply.get("groundedContent", {}).get("content", {})
+                for content_obj in content_objs:
                     text = content_obj.get("text", "")
 
                     if not text:
                         continue
+                    if not first_token_seen:
+                        first_token_seen = True
+                        request_traces.first_token(request_id)
 
                     # 区分思考过程和正常内容
                     if content_obj.get("thought"):
                         # 思考过程使用 reasoning_content 字段（类似 OpenAI o1）
-                        chunk = create_chunk(chat_id, created_time, model_name, {"reasoning_content": text}, None)
-                        yield f"data: {chunk}\n\n"
+                        event = emitter.reasoning(text)
                     else:
                         # 正常内容使用 content 字段
-                        chunk = create_chunk(chat_id, created_time, model_name, {"content": text}, None)
-                        yield f"data: {chunk}\n\n"
+                        event = emitter.content(text)
+                    if event:
+                        yield event
 
             # 提取图片信息（在 async with 块内）
             if json_objects:
@@ -1816,8 +1912,9 @@ async def stream_chat_generator(session: str, text_content: str, file_ids: List[
                     logger.error(f"[IMAGE] [{account_manager.config.account_id}] [req_{request_id}] 图片{idx}下载失败: {type(result).__name__}: {str(result)[:100]}")
                     # 降级处理：返回错误提示而不是静默失败
                     error_msg = f"\n\n⚠️ 图片 {idx} 下载失败\n\n"
-                    chunk = create_chunk(chat_id, created_time, model_name, {"content": error_msg}, None)
-                    yield f"data: {chunk}\n\n"
+                    event = emitter.content(error_msg)
+                    if event:
+                        yield event
                     continue
 
                 try:
@@ -1826,13 +1923,15 @@ async def stream_chat_generator(session: str, text_content: str, file_ids: List[
                     success_count += 1
 
                     markdown = f"\n\n![生成的图片]({image_url})\n\n"
-                    chunk = create_chunk(chat_id, created_time, model_name, {"content": markdown}, None)
-                    yield f"data: {chunk}\n\n"
+                    event = emitter.content(markdown)
+                    if event:
+                        yield event
                 except Exception as save_error:
                     logger.error(f"[IMAGE] [{account_manager.config.account_id}] [req_{request_id}] 图片{idx}保存失败: {str(save_error)[:100]}")
                     error_msg = f"\n\n⚠️ 图片 {idx} 保存失败\n\n"
-                    chunk = create_chunk(chat_id, created_time, model_name, {"content": error_msg}, None)
-                    yield f"data: {chunk}\n\n"
+                    event = emitter.content(error_msg)
+                    if event:
+                        yield event
 
             logger.info(f"[IMAGE] [{account_manager.config.account_id}] [req_{request_id}] 图片处理完成: {success_count}/{len(file_ids)} 成功")
 
@@ -1840,15 +1939,17 @@ async def stream_chat_generator(session: str, text_content: str, file_ids: List[
             logger.error(f"[IMAGE] [{account_manager.config.account_id}] [req_{request_id}] 图片处理失败: {type(e).__name__}: {str(e)[:100]}")
             # 降级处理：通知用户图片处理失败
             error_msg = f"\n\n⚠️ 图片处理失败: {type(e).__name__}\n\n"
-            chunk = create_chunk(chat_id, created_time, model_name, {"content": error_msg}, None)
-            yield f"data: {chunk}\n\n"
+            event = emitter.content(error_msg)
+            if event:
+                yield event
 
     total_time = time.time() - start_time
     logger.info(f"[API] [{account_manager.config.account_id}] [req_{request_id}] 响应完成: {total_time:.2f}秒")
+    request_traces.complete(request_id, STATUS_SUCCESS, total_time)
     
-    if is_stream:
-        final_chunk = create_chunk(chat_id, created_time, model_name, {}, "stop")
-        yield f"data: {final_chunk}\n\n"
+    event = emitter.finish("stop")
+    if event:
+        yield event
         yield "data: [DONE]\n\n"
 
 # ---------- 公开端点（无需认证） ----------
@@ -1867,39 +1968,28 @@ async def get_public_uptime_html(request: Request):
 @app.get("/public/stats")
 async def get_public_stats():
     """获取公开统计信息"""
-    async with stats_lock:
-        # 清理1小时前的请求时间戳
-        current_time = time.time()
-        global_stats["request_timestamps"] = [
-            ts for ts in global_stats["request_timestamps"]
-            if current_time - ts < 3600
-        ]
-
-        # 计算每分钟请求数
-        recent_minute = [
-            ts for ts in global_stats["request_timestamps"]
-            if current_time - ts < 60
-        ]
-        requests_per_minute = len(recent_minute)
-
-        # 计算负载状态
-        if requests_per_minute < 10:
-            load_status = "low"
-            load_color = "#10b981"  # 绿色
-        elif requests_per_minute < 30:
-            load_status = "medium"
-            load_color = "#f59e0b"  # 黄色
-        else:
-            load_status = "high"
-            load_color = "#ef4444"  # 红色
+    # 计算每分钟请求数（分桶计数，无需清理时间戳）
+    requests_per_minute = stats_store.request_rate.requests_per_minute()
+
+    # 计算负载状态
+    if requests_per_minute < 10:
+        load_status = "low"
+        load_color = "#10b981"  # 绿色
+    elif requests_per_minute < 30:
+        load_status = "medium"
+        load_color = "#f59e0b"  # 黄色
+    else:
+        load_status = "high"
+        load_color = "#ef4444"  # 红色
 
-        return {
-            "total_visitors": global_stats["total_visitors"],
-            "total_requests": global_stats["total_requests"],
-            "requests_per_minute": requests_per_minute,
-            "load_status": load_status,
-            "load_color": load_color
-        }
+    return {
+        "total_visitors": global_stats["total_visitors"],
+        "total_requests": global_stats["total_requests"],
+        "requests_per_minute": requests_per_minute,
+        "requests_per_hour": stats_store.request_rate.requests_per_hour(),
+        "load_status": load_status,
+        "load_color": load_color
+    }
 
 @app.get("/public/log")
 async def get_public_logs(request: Request, limit: int = 100):
@@ -1917,25 +2007,24 @@ async def get_public_logs(request: Request, limit: int = 100):
 
         current_time = time.time()
 
-        async with stats_lock:
-            # 清理24小时前的IP记录
-            if "visitor_ips" not in global_stats:
-                global_stats["visitor_ips"] = {}
-
-            expired_ips = [
-                ip for ip, timestamp in global_stats["visitor_ips"].items()
-                if current_time - timestamp > 86400  # 24小时
-            ]
-            for ip in expired_ips:
-                del global_stats["visitor_ips"][ip]
-
-            # 记录新访问（24小时内同一IP只计数一次）
-            if client_ip not in global_stats["visitor_ips"]:
-                global_stats["visitor_ips"][client_ip] = current_time
-
-            # 同步访问者计数（清理后的实际数量）
-            global_stats["total_visitors"] = len(global_stats["visitor_ips"])
-            await save_stats(global_stats)
+        # 清理24小时前的IP记录
+        if "visitor_ips" not in global_stats:
+            global_stats["visitor_ips"] = {}
+
+        expired_ips = [
+            ip for ip, timestamp in global_stats["visitor_ips"].items()
+            if current_time - timestamp > 86400  # 24小时
+        ]
+        for ip in expired_ips:
+            del global_stats["visitor_ips"][ip]
+
+        # 记录新访问（24小时内同一IP只计数一次）
+        if client_ip not in global_stats["visitor_ips"]:
+            global_stats["visitor_ips"][client_ip] = current_time
+
+        # 同步访问者计数（清理后的实际数量）
+        global_stats["total_visitors"] = len(global_stats["visitor_ips"])
+        stats_store.mark_dirty()
 
         sanitized_logs = get_sanitized_logs(limit=min(limit, 1000))
         return {
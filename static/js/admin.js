@@ -363,6 +363,16 @@ async function loadSettings() {
         document.getElementById('setting-logo-url').value = settings.public_display?.logo_url || '';
         document.getElementById('setting-chat-url').value = settings.public_display?.chat_url || '';
         document.getElementById('setting-session-hours').value = settings.session?.expire_hours || 24;
+
+        // 性能优化配置
+        document.getElementById('setting-stream-low-latency').checked = settings.performance?.stream_low_latency ?? false;
+        document.getElementById('setting-log-capacity').value = settings.performance?.log_capacity || 3000;
+        document.getElementById('setting-scheduler-policy').value = settings.performance?.scheduler_policy || 'round_robin';
+        document.getElementById('setting-account-rate-limit').value = settings.performance?.account_rate_limit_per_minute || 30;
+        document.getElementById('setting-session-cache-max-size').value = settings.performance?.session_cache_max_size || 1000;
+        document.getElementById('setting-session-store-enabled').checked = settings.performance?.session_store_enabled ?? false;
+        document.getElementById('setting-session-pool-size').value = settings.performance?.session_pool_size ?? 0;
+        document.getElementById('setting-session-hedge-delay').value = settings.performance?.session_hedge_delay_seconds ?? 3;
     } catch (error) {
         console.error('加载设置失败:', error);
         alert('加载设置失败: ' + error.message);
@@ -415,6 +425,16 @@ async function saveSettings() {
             },
             session: {
                 expire_hours: parseInt(document.getElementById('setting-session-hours').value) || 24
+            },
+            performance: {
+                stream_low_latency: document.getElementById('setting-stream-low-latency').checked,
+                log_capacity: parseInt(document.getElementById('setting-log-capacity').value) || 3000,
+                scheduler_policy: document.getElementById('setting-scheduler-policy').value,
+                account_rate_limit_per_minute: parseInt(document.getElementById('setting-account-rate-limit').value) || 30,
+                session_cache_max_size: parseInt(document.getElementById('setting-session-cache-max-size').value) || 1000,
+                session_store_enabled: document.getElementById('setting-session-store-enabled').checked,
+                session_pool_size: parseInt(document.getElementById('setting-session-pool-size').value) || 0,
+                session_hedge_delay_seconds: parseFloat(document.getElementById('setting-session-hedge-delay').value) || 0
             }
         };
 
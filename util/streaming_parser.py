@@ -1,6 +1,274 @@
 import json
-from typing import Iterator, Dict, Any, Iterable, AsyncIterator
-from itertools import chain
+import re
+from typing import Iterator, Dict, Any, Iterable, AsyncIterator, List, Optional, Tuple
+
+# 对象外部只关心三种结构字符：'{'、'}' 和字符串起始的 '"'
+_STRUCTURAL_RE = re.compile(r'[{}"]')
+# 字符串内部：一次性跳过所有普通字符和完整的转义序列，停在收尾的 '"'、
+# 落单的 '\\'（转义符被分到下一块）或本块末尾
+_STRING_BODY_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+# 字节版本：UTF-8 多字节字符的每个字节都 >= 0x80，不会与这些 ASCII 结构字符混淆
+_STRUCTURAL_BYTES_RE = re.compile(rb'[{}"]')
+_STRING_BODY_BYTES_RE = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+_QUOTE = ord('"')
+
+# 对象前面的键名（低延迟模式下回看 '{' 之前的 `"key": `）
+_KEY_BEFORE_RE = re.compile(rb'"([A-Za-z0-9_]{1,64})"\s*:\s*$')
+_KEY_LOOKBEHIND = 96
+
+# 低延迟模式下需要提前产出的对象路径：
+# [顶层对象].streamAssistResponse.answer.replies[*].groundedContent.content
+_CONTENT_PATH = (None, b"streamAssistResponse", b"answer", None, b"groundedContent", b"content")
+
+# 事件类型（parse_json_array_events_async 产出）
+STREAM_EVENT_CONTENT = "content"
+STREAM_EVENT_OBJECT = "object"
+
+
+class JSONArrayStreamDecoder:
+    """
+    增量式 JSON 数组解码器。
+
+    上游返回的是一个格式化的 JSON 数组，数组里每个第一层级的对象都是一次响应。
+    解码器接收任意切分的文本块，借助正则在 C 层跳过普通字符和字符串内容，
+    只在结构字符处做 Python 级别的状态更新，对象闭合时再整体交给 `json.loads`。
+
+    用法：
+        decoder = JSONArrayStreamDecoder()
+        for chunk in chunks:
+            for obj in decoder.feed(chunk):
+                ...
+        decoder.close()
+    """
+
+    def __init__(self) -> None:
+        self.in_array = False
+        self.depth = 0             # 当前对象嵌套层级
+        self.in_string = False     # 是否在字符串内部
+        self.escape_pending = False  # 上一块以转义符结尾，本块首字符需要跳过
+        self._pieces: List[str] = []  # 当前未闭合对象在之前文本块中的部分
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """喂入一个文本块，返回其中闭合的所有第一层级对象"""
+        objects: List[Dict[str, Any]] = []
+        if not chunk:
+            return objects
+
+        pos = 0
+        n = len(chunk)
+
+        # 1. 寻找数组的起始符 '['，忽略之前的所有文本（与字节版本一致）
+        if not self.in_array:
+            idx = chunk.find('[')
+            if idx == -1:
+                return objects
+            self.in_array = True
+            pos = idx + 1
+
+        # 当前块中对象的起始位置（对象从之前的块延续过来时为 0）
+        obj_start = 0
+
+        if self.escape_pending:
+            self.escape_pending = False
+            pos += 1
+
+        # 2. 在结构字符之间跳跃，逐个闭合对象
+        while pos < n:
+            if self.in_string:
+                end = _STRING_BODY_RE.match(chunk, pos).end()
+                if end >= n:
+                    pos = n
+                    break
+                if chunk[end] == '"':
+                    self.in_string = False
+                    pos = end + 1
+                else:
+                    # 以落单的转义符结尾，转义目标在下一块
+                    self.escape_pending = True
+                    pos = n
+                    break
+                continue
+
+            match = _STRUCTURAL_RE.search(chunk, pos)
+            if match is None:
+                break
+
+            char = match.group()
+            pos = match.end()
+
+            if char == '"':
+                self.in_string = True
+            elif char == '{':
+                if self.depth == 0:
+                    obj_start = match.start()
+                    self._pieces = []
+                self.depth += 1
+            elif self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    self._pieces.append(chunk[obj_start:pos])
+                    objects.append(self._decode("".join(self._pieces)))
+                    self._pieces = []
+
+        # 3. 对象尚未闭合，保留其在本块中的部分
+        if self.depth > 0:
+            self._pieces.append(chunk[obj_start:])
+
+        return objects
+
+    def close(self) -> None:
+        """流结束时调用，检查是否还有未闭合的对象"""
+        if self.depth != 0:
+            print(f"警告: JSON流意外结束，括号层级为 {self.depth}，可能数据不完整。")
+        self._pieces = []
+
+    @staticmethod
+    def _decode(obj_str: str) -> Dict[str, Any]:
+        try:
+            # 使用 strict=False 允许控制字符
+            return json.loads(obj_str, strict=False)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"解析JSON对象失败: {e}\n内容: {obj_str}") from e
+
+
+class JSONArrayBytesDecoder:
+    """
+    字节级增量 JSON 数组解码器。
+
+    直接消费 `httpx.Response.aiter_bytes()` 产出的原始字节块，数据追加到一个
+    复用的 `bytearray` 中，在字节上定位对象边界；对象闭合后才对这一段字节
+    做一次 UTF-8 解码和 `json.loads`。已经产出的对象会立即从缓冲区移除，
+    所以内存占用只与当前未闭合的对象大小相关。
+
+    early_content=True 时（低延迟模式），解码器还会跟踪对象的键路径，
+    每当 `groundedContent.content` 对象闭合就把它解码后放入 `contents`，
+    不必等到携带引用、grounding 元数据的整个顶层对象接收完毕。
+
+    用法：
+        decoder = JSONArrayBytesDecoder()
+        async for chunk in r.aiter_bytes():
+            for obj in decoder.feed(chunk):
+                ...
+        decoder.close()
+    """
+
+    def __init__(self, early_content: bool = False) -> None:
+        self.in_array = False
+        self.depth = 0             # 当前对象嵌套层级
+        self.in_string = False     # 是否在字符串内部
+        self.early_content = early_content
+        self.contents: List[Dict[str, Any]] = []  # 低延迟模式下提前闭合的 content 对象
+        self._keys: List[Optional[bytes]] = []  # 每层对象对应的键名
+        self._content_rel: Optional[int] = None  # content 对象相对顶层对象起点的偏移
+        self._buf = bytearray()    # 当前未闭合对象（或未扫描完的数据）
+        self._scan = 0             # 下一次扫描的起始位置
+        self._obj_start = 0        # 当前对象在缓冲区中的起始位置
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """喂入一个字节块，返回其中闭合的所有第一层级对象"""
+        objects: List[Dict[str, Any]] = []
+        if not chunk:
+            return objects
+
+        buf = self._buf
+        buf += chunk
+
+        # 1. 寻找数组的起始符 '['，丢弃之前的所有字节
+        if not self.in_array:
+            idx = buf.find(b'[')
+            if idx == -1:
+                buf.clear()
+                return objects
+            self.in_array = True
+            del buf[:idx + 1]
+            self._scan = 0
+
+        pos = self._scan
+        n = len(buf)
+
+        # 2. 在结构字符之间跳跃，逐个闭合对象
+        while pos < n:
+            if self.in_string:
+                end = _STRING_BODY_BYTES_RE.match(buf, pos).end()
+                if end >= n:
+                    pos = n
+                    break
+                if buf[end] == _QUOTE:
+                    self.in_string = False
+                    pos = end + 1
+                else:
+                    # 落单的转义符留在缓冲区，等下一块到达后重新扫描
+                    pos = end
+                    break
+                continue
+
+            match = _STRUCTURAL_BYTES_RE.search(buf, pos)
+            if match is None:
+                pos = n
+                break
+
+            char = match.group()
+            pos = match.end()
+
+            if char == b'"':
+                self.in_string = True
+            elif char == b'{':
+                if self.depth == 0:
+                    self._obj_start = match.start()
+                self.depth += 1
+                if self.early_content:
+                    self._enter_object(buf, match.start())
+            elif self.depth > 0:
+                if self.early_content:
+                    self._leave_object(buf, pos)
+                self.depth -= 1
+                if self.depth == 0:
+                    objects.append(self._decode(buf[self._obj_start:pos]))
+
+        # 3. 压缩缓冲区：只保留当前未闭合对象和尚未扫描的字节
+        keep_from = self._obj_start if self.depth > 0 else pos
+        if keep_from:
+            del buf[:keep_from]
+        self._scan = pos - keep_from
+        self._obj_start = 0
+
+        return objects
+
+    def _enter_object(self, buf: bytearray, start: int) -> None:
+        """记录新对象的键名，命中 content 路径时记下起点"""
+        key = None
+        if self.depth > 1:
+            match = _KEY_BEFORE_RE.search(buf, max(self._obj_start, start - _KEY_LOOKBEHIND), start)
+            if match:
+                key = match.group(1)
+        self._keys.append(key)
+        if self.depth == len(_CONTENT_PATH) and tuple(self._keys) == _CONTENT_PATH:
+            self._content_rel = start - self._obj_start
+
+    def _leave_object(self, buf: bytearray, end: int) -> None:
+        """对象闭合：如果是 content 对象，立即解码放入 contents"""
+        if self.depth == len(_CONTENT_PATH) and self._content_rel is not None:
+            start = self._obj_start + self._content_rel
+            self._content_rel = None
+            self.contents.append(self._decode(buf[start:end]))
+        self._keys.pop()
+
+    def close(self) -> None:
+        """流结束时调用，检查是否还有未闭合的对象"""
+        if self.depth != 0:
+            print(f"警告: JSON流意外结束，括号层级为 {self.depth}，可能数据不完整。")
+        self._buf.clear()
+
+    @staticmethod
+    def _decode(obj_bytes: bytearray) -> Dict[str, Any]:
+        try:
+            # 使用 strict=False 允许控制字符
+            return json.loads(obj_bytes, strict=False)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            preview = obj_bytes.decode("utf-8", errors="replace")
+            raise ValueError(f"解析JSON对象失败: {e}\n内容: {preview}") from e
+
 
 def parse_json_array_stream(line_iterator: Iterable[str]) -> Iterator[Dict[str, Any]]:
     """
@@ -8,7 +276,7 @@ def parse_json_array_stream(line_iterator: Iterable[str]) -> Iterator[Dict[str,
 
     这个函数是一个生成器，它会为在流中发现的每个第一层级的JSON对象
     产出(yield)一个完整的Python字典。它的设计目标是高内存效率，
-    因为它会逐行处理流，而不是一次性加载所有内容。
+    因为它会逐块处理流，而不是一次性加载所有内容。
 
     Args:
         line_iterator: 一个产生响应行的迭代器。例如，`requests.Response.iter_lines()`
@@ -21,92 +289,14 @@ def parse_json_array_stream(line_iterator: Iterable[str]) -> Iterator[Dict[str,
         ValueError: 如果流看起来不像是以JSON数组开始，或者其格式错误
                     导致无法按对象进行解析。
     """
-    # 状态变量
-    buffer = []
-    brace_level = 0
-    in_array = False
-
-    # 1. 寻找数组的起始符 '['，并忽略之前的所有行
+    decoder = JSONArrayStreamDecoder()
     for line in line_iterator:
-        stripped_line = line.strip()
-        if not stripped_line:
-            continue
-
-        if stripped_line.startswith('['):
-            in_array = True
-            # 去掉起始的 '[' 字符，剩下的部分继续处理
-            line = stripped_line[1:]
-            # 使用 chain 连接剩余行，避免转换为列表（内存优化）
-            line_iterator = chain([line], line_iterator)
-            break
-    
-    if not in_array:
-        raise ValueError("数据流不是以一个JSON数组 ( '[' ) 开始。")
-
-    # 2. 遍历流，逐个字符地构建和解析对象
-    in_string = False  # 是否在字符串内部
-    escape_next = False  # 下一个字符是否被转义
-
-    for line in line_iterator:
-        for char in line:
-            # 处理转义字符
-            if escape_next:
-                if brace_level > 0:
-                    buffer.append(char)
-                escape_next = False
-                continue
-
-            # 检查是否是转义符
-            if char == '\\':
-                if brace_level > 0:
-                    buffer.append(char)
-                escape_next = True
-                continue
+        yield from decoder.feed(line)
 
-            # 检查字符串边界（只在对象内部时才处理）
-            if char == '"' and brace_level > 0:
-                in_string = not in_string
-                buffer.append(char)
-                continue
+    if not decoder.in_array:
+        raise ValueError("数据流不是以一个JSON数组 ( '[' ) 开始。")
+    decoder.close()
 
-            # 只有在非字符串内部时，才处理括号
-            if not in_string:
-                # 当遇到 '{' 时，增加嵌套层级
-                if char == '{':
-                    # 如果是第一层级的对象，清空缓冲区，准备接收新对象
-                    if brace_level == 0:
-                        buffer = []
-                    brace_level += 1
-
-                # 只有在对象内部时 (brace_level > 0)，才将字符加入缓冲区
-                if brace_level > 0:
-                    buffer.append(char)
-
-                # 当遇到 '}' 时，减少嵌套层级
-                if char == '}':
-                    brace_level -= 1
-                    # 当层级回到0时，说明一个第一层级的对象已经完整
-                    if brace_level == 0 and buffer:
-                        obj_str = "".join(buffer)
-                        try:
-                            # 解析这个完整的对象字符串并产出结果
-                            # 使用 strict=False 允许控制字符
-                            yield json.loads(obj_str, strict=False)
-                        except json.JSONDecodeError as e:
-                            # 如果解析失败，抛出带上下文的异常
-                            raise ValueError(f"解析JSON对象失败: {e}\n内容: {obj_str}") from e
-                        finally:
-                            # 重置缓冲区，为下一个对象做准备
-                            buffer = []
-                            in_string = False  # 重置字符串状态
-            else:
-                # 在字符串内部，直接添加字符
-                if brace_level > 0:
-                    buffer.append(char)
-
-    # 3. 检查流结束后，是否还有未闭合的对象
-    if brace_level != 0:
-        print(f"警告: JSON流意外结束，括号层级为 {brace_level}，可能数据不完整。")
 
 async def parse_json_array_stream_async(line_iterator: AsyncIterator[str]) -> AsyncIterator[Dict[str, Any]]:
     """
@@ -114,7 +304,7 @@ async def parse_json_array_stream_async(line_iterator: AsyncIterator[str]) -> As
 
     这个函数是一个异步生成器，它会为在流中发现的每个第一层级的JSON对象
     产出(yield)一个完整的Python字典。它的设计目标是高内存效率，
-    因为它会逐行处理流，而不是一次性加载所有内容。
+    因为它会逐块处理流，而不是一次性加载所有内容。
 
     Args:
         line_iterator: 一个产生响应行的异步迭代器。例如，`httpx.Response.aiter_lines()`
@@ -126,130 +316,74 @@ async def parse_json_array_stream_async(line_iterator: AsyncIterator[str]) -> As
         ValueError: 如果流看起来不像是以JSON数组开始，或者其格式错误
                     导致无法按对象进行解析。
     """
-    # 状态变量
-    buffer = []
-    brace_level = 0
-    in_array = False
+    decoder = JSONArrayStreamDecoder()
+    async for line in line_iterator:
+        for obj in decoder.feed(line):
+            yield obj
 
-    # 1. 寻找数组的起始符 '['，并忽略之前的所有行
-    in_string = False
-    escape_next = False
+    if not decoder.in_array:
+        raise ValueError("数据流不是以一个JSON数组 ( '[' ) 开始。")
+    decoder.close()
 
-    async for line in line_iterator:
-        stripped_line = line.strip()
-        if not stripped_line:
-            continue
-
-        if stripped_line.startswith('['):
-            in_array = True
-            # 去掉起始的 '[' 字符，剩下的部分继续处理
-            line = stripped_line[1:]
-            # 处理剩余部分（使用相同的字符串状态跟踪逻辑）
-            for char in line:
-                if escape_next:
-                    if brace_level > 0:
-                        buffer.append(char)
-                    escape_next = False
-                    continue
-
-                if char == '\\':
-                    if brace_level > 0:
-                        buffer.append(char)
-                    escape_next = True
-                    continue
-
-                if char == '"' and brace_level > 0:
-                    in_string = not in_string
-                    buffer.append(char)
-                    continue
-
-                if not in_string:
-                    if char == '{':
-                        if brace_level == 0:
-                            buffer = []
-                        brace_level += 1
-
-                    if brace_level > 0:
-                        buffer.append(char)
-
-                    if char == '}':
-                        brace_level -= 1
-                        if brace_level == 0 and buffer:
-                            obj_str = "".join(buffer)
-                            try:
-                                yield json.loads(obj_str, strict=False)
-                            except json.JSONDecodeError as e:
-                                raise ValueError(f"解析JSON对象失败: {e}\n内容: {obj_str}") from e
-                            finally:
-                                buffer = []
-                                in_string = False
-                else:
-                    if brace_level > 0:
-                        buffer.append(char)
-            break
 
-    if not in_array:
+async def parse_json_array_stream_bytes_async(byte_iterator: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    字节流版本：直接解析原始字节块组成的 JSON 数组流。
+
+    与 `parse_json_array_stream_async` 产出相同的对象，但跳过了 httpx 的
+    逐行解码和切分，每个对象只在闭合时解码一次。
+
+    Args:
+        byte_iterator: 一个产生原始字节块的异步迭代器。例如，`httpx.Response.aiter_bytes()`
+
+    Yields:
+        一个从流中解析出的JSON对象的字典。
+
+    Raises:
+        ValueError: 如果流中没有JSON数组，或者其格式错误导致无法按对象进行解析。
+    """
+    decoder = JSONArrayBytesDecoder()
+    async for chunk in byte_iterator:
+        for obj in decoder.feed(chunk):
+            yield obj
+
+    if not decoder.in_array:
         raise ValueError("数据流不是以一个JSON数组 ( '[' ) 开始。")
+    decoder.close()
 
-    # 2. 遍历流，逐个字符地构建和解析对象（保持第一行处理后的状态）
-    async for line in line_iterator:
-        for char in line:
-            # 处理转义字符
-            if escape_next:
-                if brace_level > 0:
-                    buffer.append(char)
-                escape_next = False
-                continue
 
-            # 检查是否是转义符
-            if char == '\\':
-                if brace_level > 0:
-                    buffer.append(char)
-                escape_next = True
-                continue
+async def parse_json_array_events_async(
+    byte_iterator: AsyncIterator[bytes],
+    early_content: bool = False
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    事件版本：解析原始字节流，产出 (事件类型, 数据) 元组。
 
-            # 检查字符串边界（只在对象内部时才处理）
-            if char == '"' and brace_level > 0:
-                in_string = not in_string
-                buffer.append(char)
-                continue
+    - (STREAM_EVENT_OBJECT, obj): 一个完整的第一层级对象
+    - (STREAM_EVENT_CONTENT, content): 仅 early_content=True 时产出，
+      某个 `groundedContent.content` 对象刚闭合，此时所属的顶层对象可能还没收完
+
+    低延迟模式下，content 中的文本已经通过 CONTENT 事件产出，
+    调用方处理随后到达的 OBJECT 事件时不应再重复提取文本。
 
-            # 只有在非字符串内部时，才处理括号
-            if not in_string:
-                # 当遇到 '{' 时，增加嵌套层级
-                if char == '{':
-                    # 如果是第一层级的对象，清空缓冲区，准备接收新对象
-                    if brace_level == 0:
-                        buffer = []
-                    brace_level += 1
-
-                # 只有在对象内部时 (brace_level > 0)，才将字符加入缓冲区
-                if brace_level > 0:
-                    buffer.append(char)
-
-                # 当遇到 '}' 时，减少嵌套层级
-                if char == '}':
-                    brace_level -= 1
-                    # 当层级回到0时，说明一个第一层级的对象已经完整
-                    if brace_level == 0 and buffer:
-                        obj_str = "".join(buffer)
-                        try:
-                            # 解析这个完整的对象字符串并产出结果
-                            # 使用 strict=False 允许控制字符
-                            yield json.loads(obj_str, strict=False)
-                        except json.JSONDecodeError as e:
-                            # 如果解析失败，抛出带上下文的异常
-                            raise ValueError(f"解析JSON对象失败: {e}\n内容: {obj_str}") from e
-                        finally:
-                            # 重置缓冲区，为下一个对象做准备
-                            buffer = []
-                            in_string = False  # 重置字符串状态
-            else:
-                # 在字符串内部，直接添加字符
-                if brace_level > 0:
-                    buffer.append(char)
-
-    # 3. 检查流结束后，是否还有未闭合的对象
-    if brace_level != 0:
-        print(f"警告: JSON流意外结束，括号层级为 {brace_level}，可能数据不完整。")
+    Args:
+        byte_iterator: 一个产生原始字节块的异步迭代器。例如，`httpx.Response.aiter_bytes()`
+        early_content: 是否启用低延迟模式
 
+    Raises:
+        ValueError: 如果流中没有JSON数组，或者其格式错误导致无法按对象进行解析。
+    """
+    decoder = JSONArrayBytesDecoder(early_content=early_content)
+    async for chunk in byte_iterator:
+        objects = decoder.feed(chunk)
+        # content 总是先于其所属的顶层对象闭合，先产出 content 保证文本顺序
+        if decoder.contents:
+            for content in decoder.contents:
+                yield STREAM_EVENT_CONTENT, content
+            decoder.contents.clear()
+        for obj in objects:
+            yield STREAM_EVENT_OBJECT, obj
+
+    if not decoder.in_array:
+        raise ValueError("数据流不是以一个JSON数组 ( '[' ) 开始。")
+    decoder.close()
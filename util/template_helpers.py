@@ -94,7 +94,7 @@ def _get_account_status(account_manager):
 
 
 def prepare_admin_template_data(
-    request, multi_account_mgr, log_buffer, log_lock,
+    request, multi_account_mgr, log_store,
     api_key, base_url, proxy, logo_url, chat_url, path_prefix,
     max_new_session_tries, max_request_retries, max_account_switch_tries,
     account_failure_threshold, rate_limit_cooldown_seconds, session_cache_ttl_seconds
@@ -103,12 +103,8 @@ def prepare_admin_template_data(
     # 获取当前页面的完整URL
     current_url = get_base_url_from_request(request)
 
-    # 获取错误统计
-    error_count = 0
-    with log_lock:
-        for log in log_buffer:
-            if log.get("level") in ["ERROR", "CRITICAL"]:
-                error_count += 1
+    # 获取错误统计（日志存储中预先聚合）
+    error_count = log_store.error_count()
 
     # API接口信息
     admin_path_segment = f"{path_prefix}" if path_prefix else "admin"